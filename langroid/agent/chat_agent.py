@@ -1076,7 +1076,9 @@ class ChatAgent(Agent):
         self.update_last_message(message, role=Role.USER)
         return answer_doc
 
-    def llm_response_forget(self, message: str) -> ChatDocument:
+    def llm_response_forget(
+        self, message: str, stream: Optional[bool] = None
+    ) -> ChatDocument:
         """
         LLM Response to single message, and restore message_history.
         In effect a "one-off" message & response that leaves agent
@@ -1084,6 +1086,9 @@ class ChatAgent(Agent):
 
         Args:
             message (str): user message
+            stream (bool|None): whether to stream the response (if allowed
+                globally via `settings.stream`); None means use the LLM's
+                current streaming setting.
 
         Returns:
             A Document object with the response.
@@ -1092,7 +1097,9 @@ class ChatAgent(Agent):
         # explicitly call THIS class's respond method,
         # not a derived class's (or else there would be infinite recursion!)
         n_msgs = len(self.message_history)
-        with StreamingIfAllowed(self.llm, self.llm.get_stream()):  # type: ignore
+        if stream is None:
+            stream = self.llm.get_stream()  # type: ignore
+        with StreamingIfAllowed(self.llm, stream):  # type: ignore
             response = cast(ChatDocument, ChatAgent.llm_response(self, message))
         # If there is a response, then we will have two additional
         # messages in the message history, i.e. the user message and the
@@ -1107,14 +1114,18 @@ class ChatAgent(Agent):
 
         return response
 
-    async def llm_response_forget_async(self, message: str) -> ChatDocument:
+    async def llm_response_forget_async(
+        self, message: str, stream: Optional[bool] = None
+    ) -> ChatDocument:
         """
         Async version of `llm_response_forget`. See there for details.
         """
         # explicitly call THIS class's respond method,
         # not a derived class's (or else there would be infinite recursion!)
         n_msgs = len(self.message_history)
-        with StreamingIfAllowed(self.llm, self.llm.get_stream()):  # type: ignore
+        if stream is None:
+            stream = self.llm.get_stream()  # type: ignore
+        with StreamingIfAllowed(self.llm, stream):  # type: ignore
             response = cast(
                 ChatDocument, await ChatAgent.llm_response_async(self, message)
             )
@@ -13,14 +13,31 @@ pip install "langroid[hf-embeddings]"
 
 """
 
+import asyncio
+import hashlib
+import inspect
+import json
 import logging
 from collections import OrderedDict
-from functools import cache
-from typing import Any, Dict, List, Optional, Set, Tuple, no_type_check
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Literal,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+    no_type_check,
+)
 
 import nest_asyncio
 import numpy as np
 import pandas as pd
+from rank_bm25 import BM25Okapi
 from rich.prompt import Prompt
 
 from langroid.agent.batch import run_batch_tasks
@@ -32,26 +49,31 @@ from langroid.agent.special.relevance_extractor_agent import (
 )
 from langroid.agent.task import Task
 from langroid.agent.tools.retrieval_tool import RetrievalTool
+from langroid.cachedb.base import CacheDB
+from langroid.embedding_models.base import EmbeddingModel
 from langroid.embedding_models.models import (
     OpenAIEmbeddingsConfig,
     SentenceTransformerEmbeddingsConfig,
 )
-from langroid.language_models.base import StreamingIfAllowed
+from langroid.language_models.base import LanguageModel, StreamingIfAllowed
 from langroid.language_models.openai_gpt import OpenAIChatModel, OpenAIGPTConfig
-from langroid.mytypes import DocMetaData, Document, Entity
+from langroid.mytypes import DocMetaData, Document, Embeddings, Entity
 from langroid.parsing.document_parser import DocumentType
 from langroid.parsing.parser import Parser, ParsingConfig, PdfParsingConfig, Splitter
 from langroid.parsing.repo_loader import RepoLoader
 from langroid.parsing.search import (
+    build_bm25_index,
     find_closest_matches_with_bm25,
     find_fuzzy_matches_in_docs,
     preprocess_text,
+    top_k_indices,
 )
 from langroid.parsing.table_loader import describe_dataframe
 from langroid.parsing.url_loader import URLLoader
 from langroid.parsing.urls import get_list_from_user, get_urls_paths_bytes_indices
 from langroid.prompts.prompts_config import PromptsConfig
 from langroid.prompts.templates import SUMMARY_ANSWER_PROMPT_GPT4
+from langroid.utils.configuration import settings
 from langroid.utils.constants import NO_ANSWER
 from langroid.utils.object_registry import ObjectRegistry
 from langroid.utils.output import show_if_debug, status
@@ -59,18 +81,60 @@ from langroid.utils.output.citations import (
     extract_markdown_references,
     format_footnote_text,
 )
-from langroid.utils.pydantic_utils import dataframe_to_documents, extract_fields
+from langroid.utils.pydantic_utils import (
+    dataframe_to_documents,
+    extract_fields,
+    model_to_builtins,
+)
 from langroid.vector_store.base import VectorStore, VectorStoreConfig
 from langroid.vector_store.qdrantdb import QdrantDBConfig
 
 
-@cache
 def apply_nest_asyncio() -> None:
-    nest_asyncio.apply()
+    """
+    Make the running event loop re-entrant (once per loop), so that sync code
+    which calls `asyncio.run` (e.g. `run_batch_tasks`) works from within it,
+    as in Jupyter notebooks. This is a no-op when there is no running loop,
+    when it is already patched, or when it cannot be patched (e.g. uvloop).
+    """
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    # nest_asyncio marks the loops it has patched
+    if getattr(loop, "_nest_patched", False):
+        return
+    if not isinstance(loop, asyncio.BaseEventLoop):
+        return
+    nest_asyncio.apply(loop)
 
 
 logger = logging.getLogger(__name__)
 
+
+@lru_cache(maxsize=256)
+def _periphery_permutation(n: int) -> Tuple[int, ...]:
+    """Index order for `DocChatAgent.rerank_to_periphery`, for n passages"""
+    return tuple(range(0, n, 2)) + tuple(range(n - 1 - n % 2, 0, -2))
+
+
+@lru_cache(maxsize=None)
+def _has_only_content_and_metadata(doc_cls: Type[Document]) -> bool:
+    """Whether a Document (sub)class has no fields besides content and metadata"""
+    return set(doc_cls.__fields__) == {"content", "metadata"}
+
+
+@lru_cache(maxsize=1)
+def _lexical_search_executor() -> ThreadPoolExecutor:
+    """Shared pool in which the (CPU-bound) bm25 and fuzzy-match searches run,
+    overlapped with the semantic search in the calling thread"""
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="doc-chat-lexical")
+
+
+# max number of passages for which rerank_with_diversity precomputes
+# the full passage-passage similarity matrix
+DIVERSITY_SIM_MATRIX_MAX_N = 256
+
 DEFAULT_DOC_CHAT_INSTRUCTIONS = """
 Your task is to answer questions about various documents.
 You will be given various passages from these documents, and asked to answer questions
@@ -112,6 +176,10 @@ class DocChatAgentConfig(ChatAgentConfig):
     filter_fields: List[str] = []  # fields usable in filter
     retrieve_only: bool = False  # only retr relevant extracts, don't gen summary answer
     extraction_granularity: int = 1  # granularity (in sentences) for relev extraction
+    # max number of concurrent LLM relevance-extraction calls (one per passage);
+    # 1 (default) runs them sequentially, since some LLM APIs (e.g. local ones)
+    # don't support concurrent requests
+    extraction_concurrency: int = 1
     filter: str | None = (
         None  # filter condition for various lexical/semantic search fns
     )
@@ -127,6 +195,13 @@ class DocChatAgentConfig(ChatAgentConfig):
     # It is False by default; its benefits depends on the context.
     hypothetical_answer: bool = False
     n_query_rephrases: int = 0
+    # max number of cached LLM responses for the above (HyDE, rephrase) and
+    # stand-alone query rewrites, so repeated queries skip the LLM;
+    # 0 to disable caching
+    rewrite_cache_size: int = 1024
+    # also persist query rewrites in the LLM's response cache (see
+    # `LLMConfig.cache_config`), so they survive across sessions/reloads
+    llm_response_cache: bool = False
     n_neighbor_chunks: int = 0  # how many neighbors on either side of match to retrieve
     n_fuzzy_neighbor_words: int = 100  # num neighbor words to retrieve for fuzzy match
     use_fuzzy_match: bool = True
@@ -135,6 +210,13 @@ class DocChatAgentConfig(ChatAgentConfig):
     cross_encoder_reranking_model: str = (
         "cross-encoder/ms-marco-MiniLM-L-6-v2" if has_sentence_transformers else ""
     )
+    cross_encoder_batch_size: int = 32  # batch size for cross-encoder predictions
+    # inference backend for the cross-encoder: "onnx" or "openvino" are typically
+    # much faster on CPU, but need sentence-transformers with backend support,
+    # and the optimum[onnxruntime] or optimum[openvino] extras
+    cross_encoder_backend: Literal["torch", "onnx", "openvino"] = "torch"
+    # use the int8-quantized ONNX model (only for the "onnx" backend)
+    cross_encoder_quantize: bool = False
     rerank_diversity: bool = True  # rerank to maximize diversity?
     rerank_periphery: bool = True  # rerank to avoid Lost In the Middle effect?
     rerank_after_adding_context: bool = True  # rerank after adding context window?
@@ -145,6 +227,16 @@ class DocChatAgentConfig(ChatAgentConfig):
     debug: bool = False
     stream: bool = True  # allow streaming where needed
     split: bool = True  # use chunking
+    max_load_workers: int = 32  # max threads for concurrent loading of paths
+    # When augmenting doc metadata during ingestion, update the metadata objects
+    # in place (without validation) rather than making a (pydantic) copy for
+    # each doc. Only set to True if each doc passed to `ingest_docs` has its own
+    # metadata object, not shared with other docs or used elsewhere.
+    fast_metadata_merge: bool = False
+    # skip (i.e. don't re-split, re-embed or re-store) docs whose content and
+    # metadata are identical to docs previously ingested by this agent
+    # into the same vecdb collection
+    skip_duplicate_docs: bool = False
     relevance_extractor_config: None | RelevanceExtractorAgentConfig = (
         RelevanceExtractorAgentConfig(
             llm=None  # use the parent's llm unless explicitly set here
@@ -216,7 +308,22 @@ class DocChatAgent(ChatAgent):
         self.df_description = ""
         self.chunked_docs: List[Document] = []
         self.chunked_docs_clean: List[Document] = []
+        # BM25 index over chunked_docs_clean, see `_ensure_bm25`
+        self.bm25_index: BM25Okapi | None = None
+        # doc id -> preprocessed content, so that re-running `setup_documents`
+        # (e.g. on every `set_filter`) does not re-clean unchanged docs
+        self.id2clean_content: Dict[str, str] = {}
+        # (vecdb, collection) -> hashes of docs ingested into it, see `_new_docs`
+        self.ingested_doc_hashes: Dict[Tuple[str, ...], Set[str]] = {}
         self.response: None | Document = None
+        # LRU cache of LLM responses to query-rewriting (HyDE, rephrase) prompts
+        self.llm_rewrite_cache: OrderedDict[str, str] = OrderedDict()
+        # cross-encoder used for re-ranking, loaded on first use
+        self.cross_encoder: Any = None
+        self.cross_encoder_spec: Tuple[str, str, bool] | None = None
+        # embedding fn used for diversity re-ranking, and the model it came from
+        self.diversity_emb_fn: Callable[[List[str]], Embeddings] | None = None
+        self.diversity_emb_model: EmbeddingModel | None = None
         if len(config.doc_paths) > 0:
             self.ingest()
 
@@ -226,6 +333,9 @@ class DocChatAgent(ChatAgent):
         self.original_docs_length = 0
         self.chunked_docs = []
         self.chunked_docs_clean = []
+        self.bm25_index = None
+        self.id2clean_content = {}
+        self.ingested_doc_hashes = {}
         if self.vecdb is None:
             logger.warning("Attempting to clear VecDB, but VecDB not set.")
             return
@@ -323,28 +433,57 @@ class DocChatAgent(ChatAgent):
             paths_meta = {p: idx2meta[p] for p in path_idxs}
         docs: List[Document] = []
         parser = Parser(self.config.parsing)
-        if len(urls) > 0:
+
+        if len(url_idxs) > 0:
+            # A single loader for all urls, so that trafilatura's buffered
+            # downloads can throttle requests to the same host.
+            loader = URLLoader(urls=urls, parser=parser)  # type: ignore
+            url_docs: List[Document] = loader.load()
+            # map the loaded docs back to their urls (and hence metadata) by source,
+            # keeping the input order of urls. The source of a doc is its url,
+            # possibly followed by a page range (e.g. "<url> pages 1-3"),
+            # and urls contain no spaces.
+            source2docs: Dict[str, List[Document]] = {}
+            for d in url_docs:
+                url = d.metadata.source.split(" ", 1)[0]
+                source2docs.setdefault(url, []).append(d)
             for ui in url_idxs:
                 meta = urls_meta.get(ui, {})
-                loader = URLLoader(urls=[all_paths[ui]], parser=parser)  # type: ignore
-                url_docs = loader.load()
-                # update metadata of each doc with meta
-                for d in url_docs:
-                    d.metadata = d.metadata.copy(update=meta)
-                docs.extend(url_docs)
-        if len(paths) > 0:  # paths OR bytes are handled similarly
+                for d in source2docs.pop(all_paths[ui], []):  # type: ignore
+                    self._update_metadata(d, meta)
+                    docs.append(d)
+            for unmatched_docs in source2docs.values():
+                docs.extend(unmatched_docs)
+
+        def _load_path(pi: int) -> List[Document]:
+            # paths OR bytes are handled similarly
+            meta = paths_meta.get(pi, {})
+            path_docs: List[Document] = RepoLoader.get_documents(
+                all_paths[pi],
+                parser=parser,
+                doc_type=doc_type,
+            )
+            # update metadata of each doc with meta
+            for d in path_docs:
+                self._update_metadata(d, meta)
+            return path_docs
+
+        # Loading local paths is I/O-bound (disk read, parsing), so we load
+        # them concurrently; `map` preserves the input order of docs.
+        # The fitz (PyMuPDF) library is not thread-safe, so when it is used
+        # to parse pdfs, we load the paths sequentially.
+        max_workers = (
+            1
+            if self.config.parsing.pdf.library == "fitz"
+            else min(self.config.max_load_workers, len(path_idxs))
+        )
+        if max_workers <= 1:
             for pi in path_idxs:
-                meta = paths_meta.get(pi, {})
-                p = all_paths[pi]
-                path_docs = RepoLoader.get_documents(
-                    p,
-                    parser=parser,
-                    doc_type=doc_type,
-                )
-                # update metadata of each doc with meta
-                for d in path_docs:
-                    d.metadata = d.metadata.copy(update=meta)
-                docs.extend(path_docs)
+                docs.extend(_load_path(pi))
+        else:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                for result in executor.map(_load_path, path_idxs):
+                    docs.extend(result)
         n_docs = len(docs)
         n_splits = self.ingest_docs(docs, split=self.config.split)
         if n_docs == 0:
@@ -384,21 +523,28 @@ class DocChatAgent(ChatAgent):
         """
         if isinstance(metadata, list) and len(metadata) > 0:
             for d, m in zip(docs, metadata):
-                d.metadata = d.metadata.copy(
-                    update=m if isinstance(m, dict) else m.dict()  # type: ignore
+                self._update_metadata(
+                    d, m if isinstance(m, dict) else m.dict()  # type: ignore
                 )
         elif isinstance(metadata, dict):
             for d in docs:
-                d.metadata = d.metadata.copy(update=metadata)
+                self._update_metadata(d, metadata)
         elif isinstance(metadata, DocMetaData):
+            metadata_dict = metadata.dict()
             for d in docs:
-                d.metadata = d.metadata.copy(update=metadata.dict())
-
+                self._update_metadata(d, metadata_dict)
+
+        new_doc_hashes: List[str] = []
+        if self.config.skip_duplicate_docs:
+            docs, new_doc_hashes = self._new_docs(docs)
+            if len(docs) == 0:
+                logger.warning("All docs were previously ingested; skipping them.")
+                return 0
         self.original_docs.extend(docs)
         if self.parser is None:
             raise ValueError("Parser not set")
         for d in docs:
-            if d.metadata.id in [None, ""]:
+            if not d.metadata.id:
                 d.metadata.id = ObjectRegistry.new_id()
         if split:
             docs = self.parser.split(docs)
@@ -429,13 +575,75 @@ class DocChatAgent(ChatAgent):
                         + d.content
                     )
         docs = docs[: self.config.parsing.max_chunks]
+        # (re-)ingested docs may have new content for an existing id,
+        # so drop any stale cleaned content for these ids
+        for d in docs:
+            self.id2clean_content.pop(d.id(), None)
         # vecdb should take care of adding docs in batches;
         # batching can be controlled via vecdb.config.batch_size
         self.vecdb.add_documents(docs)
+        # record hashes only once the docs are stored, so a failed ingest
+        # can be retried
+        self._ingested_doc_hashes().update(new_doc_hashes)
         self.original_docs_length = self.doc_length(docs)
         self.setup_documents(docs, filter=self.config.filter)
         return len(docs)
 
+    def _ingested_doc_hashes(self) -> Set[str]:
+        """Hashes of docs ingested so far into the current vecdb collection"""
+        if self.vecdb is None:
+            raise ValueError("VecDB not set")
+        # key on the store (rather than the vecdb object, whose id may be reused
+        # after it is garbage-collected) and the collection within it
+        config = self.vecdb.config
+        key = (
+            type(self.vecdb).__name__,
+            str(config.cloud),
+            config.host,
+            str(config.port),
+            config.storage_path,
+            config.collection_name or "",
+        )
+        return self.ingested_doc_hashes.setdefault(key, set())
+
+    def _new_docs(self, docs: List[Document]) -> Tuple[List[Document], List[str]]:
+        """
+        Filter out docs identical (in content and metadata, ignoring ids)
+        to docs already ingested into the current vecdb collection,
+        so that we don't re-split, re-embed and re-store them.
+        (Identical docs within `docs` itself are all kept.)
+
+        Returns:
+            the new docs, and their hashes
+        """
+        ingested = self._ingested_doc_hashes()
+        new_docs = []
+        new_hashes = []
+        for d in docs:
+            doc_dict = model_to_builtins(d)
+            doc_dict["metadata"].pop("id", None)
+            doc_dict["metadata"].pop("window_ids", None)
+            doc_hash = hashlib.sha256(
+                json.dumps(doc_dict, sort_keys=True, default=str).encode()
+            ).hexdigest()
+            if doc_hash in ingested:
+                continue
+            new_docs.append(d)
+            new_hashes.append(doc_hash)
+        return new_docs, new_hashes
+
+    def _update_metadata(self, doc: Document, update: Dict[str, Any]) -> None:
+        """
+        Merge `update` into `doc.metadata`: in place if
+        `config.fast_metadata_merge` is set, else via a pydantic copy.
+        """
+        if self.config.fast_metadata_merge:
+            metadata = doc.metadata
+            for k, v in update.items():
+                setattr(metadata, k, v)
+        else:
+            doc.metadata = doc.metadata.copy(update=update)
+
     def retrieval_tool(self, msg: RetrievalTool) -> str:
         """Handle the RetrievalTool message"""
         self.config.retrieve_only = True
@@ -479,9 +687,7 @@ class DocChatAgent(ChatAgent):
 
         actual_metadata = metadata.copy()
         if "id" not in df.columns:
-            docs = dataframe_to_documents(df, content="content", metadata=metadata)
-            ids = [str(d.id()) for d in docs]
-            df["id"] = ids
+            df["id"] = [ObjectRegistry.new_id() for _ in range(len(df))]
 
         if "id" not in actual_metadata:
             actual_metadata += ["id"]
@@ -533,15 +739,43 @@ class DocChatAgent(ChatAgent):
         if filter is None and len(docs) > 0:
             # no filter, so just use the docs passed in
             self.chunked_docs.extend(docs)
+            self.chunked_docs_clean.extend(
+                Document(content=self._clean_content(d), metadata=d.metadata)
+                for d in docs
+            )
         else:
             if self.vecdb is None:
                 raise ValueError("VecDB not set")
-            self.chunked_docs = self.vecdb.get_all_documents(where=filter or "")
+            # stream docs from the vecdb, building both lists batch by batch
+            self.chunked_docs = []
+            self.chunked_docs_clean = []
+            for batch in self.vecdb.stream_documents(where=filter or ""):
+                self.chunked_docs.extend(batch)
+                self.chunked_docs_clean.extend(
+                    Document(content=self._clean_content(d), metadata=d.metadata)
+                    for d in batch
+                )
+
+        # chunked_docs_clean changed, so the bm25 index must be rebuilt
+        self.bm25_index = None
 
-        self.chunked_docs_clean = [
-            Document(content=preprocess_text(d.content), metadata=d.metadata)
-            for d in self.chunked_docs
-        ]
+    def _ensure_bm25(self) -> BM25Okapi:
+        """
+        BM25 index over `self.chunked_docs_clean`, built on first use after
+        `setup_documents`, and reused across queries.
+        """
+        if self.bm25_index is None:
+            self.bm25_index = build_bm25_index(self.chunked_docs_clean)
+        return self.bm25_index
+
+    def _clean_content(self, doc: Document) -> str:
+        """Preprocessed content of a doc, cached by doc id"""
+        doc_id = doc.id()
+        clean = self.id2clean_content.get(doc_id)
+        if clean is None:
+            clean = preprocess_text(doc.content)
+            self.id2clean_content[doc_id] = clean
+        return clean
 
     def get_field_values(self, fields: list[str]) -> Dict[str, str]:
         """Get string-listing of possible values of each field,
@@ -552,22 +786,10 @@ class DocChatAgent(ChatAgent):
         }
         The field names may have "metadata." prefix, e.g. "metadata.genre".
         """
-        field_values: Dict[str, Set[str]] = {}
-        # make empty set for each field
-        for f in fields:
-            field_values[f] = set()
         if self.vecdb is None:
             raise ValueError("VecDB not set")
-        # get all documents and accumulate possible values of each field until 10
-        docs = self.vecdb.get_all_documents()  # only works for vecdbs that support this
-        for d in docs:
-            # extract fields from d
-            doc_field_vals = extract_fields(d, fields)
-            # the `field` returned by extract_fields may contain only the last
-            # part of the field name, e.g. "genre" instead of "metadata.genre",
-            # so we use the orig_field name to fill in the values
-            for (field, val), orig_field in zip(doc_field_vals.items(), fields):
-                field_values[orig_field].add(val)
+        # only works for vecdbs that support getting all docs
+        field_values = self.vecdb.distinct_field_values(fields)
         # For each field make a string showing list of possible values,
         # truncate to 20 values, and if there are more, indicate how many
         # more there are, e.g. Genre: crime, drama, mystery, ... (20 more)
@@ -655,6 +877,8 @@ class DocChatAgent(ChatAgent):
             )
 
         self.vecdb.set_collection(collection_name, replace=replace_collection)
+        # the collection may have been replaced
+        self.ingested_doc_hashes = {}
 
         default_urls_str = (
             " (or leave empty for default URLs)" if is_new_collection else ""
@@ -722,7 +946,6 @@ class DocChatAgent(ChatAgent):
         self,
         query: None | str | ChatDocument = None,
     ) -> Optional[ChatDocument]:
-        apply_nest_asyncio()
         if not self.llm_can_respond(query):
             return None
         query_str: str | None
@@ -751,7 +974,7 @@ class DocChatAgent(ChatAgent):
             return self.summarize_docs()
         else:
             self.callbacks.show_start_response(entity="llm")
-            response = self.answer_from_docs(query_str)
+            response = await self.answer_from_docs_async(query_str)
             self._render_llm_response(response, citation_only=True)
             return ChatDocument(
                 content=response.content,
@@ -770,18 +993,14 @@ class DocChatAgent(ChatAgent):
         Returns:
             str: string representation
         """
-        contents = [f"Extract: {d.content}" for d in docs]
-        sources = [d.metadata.source for d in docs]
-        sources = [f"Source: {s}" if s is not None else "" for s in sources]
+        # single pass over docs, without building intermediate lists
         return "\n".join(
-            [
-                f"""
+            f"""
                 [{i+1}]
-                {content}
-                {source}
+                Extract: {d.content}
+                {"" if d.metadata.source is None else f"Source: {d.metadata.source}"}
                 """
-                for i, (content, source) in enumerate(zip(contents, sources))
-            ]
+            for i, d in enumerate(docs)
         )
 
     def get_summary_answer(
@@ -800,13 +1019,7 @@ class DocChatAgent(ChatAgent):
 
         """
 
-        passages_str = self.doc_string(passages)
-        # Substitute Q and P into the templatized prompt
-
-        final_prompt = self.config.summarize_prompt.format(
-            question=question, extracts=passages_str
-        )
-        show_if_debug(final_prompt, "SUMMARIZE_PROMPT= ")
+        final_prompt = self._summary_prompt(question, passages)
 
         # Generate the final verbatim extract based on the final prompt.
         # Note this will send entire message history, plus this final_prompt
@@ -820,6 +1033,36 @@ class DocChatAgent(ChatAgent):
         else:
             answer_doc = super().llm_response_forget(final_prompt)
 
+        return self._summary_answer_doc(answer_doc, passages)
+
+    async def get_summary_answer_async(
+        self, question: str, passages: List[Document]
+    ) -> ChatDocument:
+        """
+        Async version of `get_summary_answer`. See there for details.
+        """
+        final_prompt = self._summary_prompt(question, passages)
+        if self.config.conversation_mode:
+            answer_doc = await super()._llm_response_temp_context_async(
+                question, final_prompt
+            )
+        else:
+            answer_doc = await super().llm_response_forget_async(final_prompt)
+
+        return self._summary_answer_doc(answer_doc, passages)
+
+    def _summary_prompt(self, question: str, passages: List[Document]) -> str:
+        passages_str = self.doc_string(passages)
+        # Substitute Q and P into the templatized prompt
+        final_prompt = self.config.summarize_prompt.format(
+            question=question, extracts=passages_str
+        )
+        show_if_debug(final_prompt, "SUMMARIZE_PROMPT= ")
+        return final_prompt
+
+    def _summary_answer_doc(
+        self, answer_doc: ChatDocument, passages: List[Document]
+    ) -> ChatDocument:
         final_answer = answer_doc.content.strip()
         show_if_debug(final_answer, "SUMMARIZE_RESPONSE= ")
 
@@ -849,36 +1092,125 @@ class DocChatAgent(ChatAgent):
     def llm_hypothetical_answer(self, query: str) -> str:
         if self.llm is None:
             raise ValueError("LLM not set")
-        with status("[cyan]LLM generating hypothetical answer..."):
-            with StreamingIfAllowed(self.llm, False):
-                # TODO: provide an easy way to
-                # Adjust this prompt depending on context.
-                answer = self.llm_response_forget(
-                    f"""
-                    Give an ideal answer to the following query,
-                    in up to 3 sentences. Do not explain yourself,
-                    and do not apologize, just show
-                    a good possible answer, even if you do not have any information.
-                    Preface your answer with "HYPOTHETICAL ANSWER: "
-
-                    QUERY: {query}
-                    """
+        prompt = self._hypothetical_answer_prompt(query)
+        answer = self._cached_rewrite(prompt)
+        if answer is None:
+            with status("[cyan]LLM generating hypothetical answer..."):
+                answer = self.llm_response_forget(prompt, stream=False).content
+            self._cache_rewrite(prompt, answer)
+        return answer
+
+    async def llm_hypothetical_answer_async(self, query: str) -> str:
+        if self.llm is None:
+            raise ValueError("LLM not set")
+        prompt = self._hypothetical_answer_prompt(query)
+        answer = self._cached_rewrite(prompt)
+        if answer is None:
+            with status("[cyan]LLM generating hypothetical answer..."):
+                answer = (
+                    await self.llm_response_forget_async(prompt, stream=False)
                 ).content
+            self._cache_rewrite(prompt, answer)
         return answer
 
+    @staticmethod
+    def _hypothetical_answer_prompt(query: str) -> str:
+        # TODO: provide an easy way to
+        # Adjust this prompt depending on context.
+        return f"""
+            Give an ideal answer to the following query,
+            in up to 3 sentences. Do not explain yourself,
+            and do not apologize, just show
+            a good possible answer, even if you do not have any information.
+            Preface your answer with "HYPOTHETICAL ANSWER: "
+
+            QUERY: {query}
+            """
+
     def llm_rephrase_query(self, query: str) -> List[str]:
         if self.llm is None:
             raise ValueError("LLM not set")
-        with status("[cyan]LLM generating rephrases of query..."):
-            with StreamingIfAllowed(self.llm, False):
-                rephrases = self.llm_response_forget(
-                    f"""
-                        Rephrase the following query in {self.config.n_query_rephrases}
-                        different equivalent ways, separate them with 2 newlines.
-                        QUERY: {query}
-                        """
-                ).content.split("\n\n")
-        return rephrases
+        prompt = self._rephrase_query_prompt(query)
+        rephrases = self._cached_rewrite(prompt)
+        if rephrases is None:
+            with status("[cyan]LLM generating rephrases of query..."):
+                rephrases = self.llm_response_forget(prompt, stream=False).content
+            self._cache_rewrite(prompt, rephrases)
+        return rephrases.split("\n\n")
+
+    async def llm_rephrase_query_async(self, query: str) -> List[str]:
+        if self.llm is None:
+            raise ValueError("LLM not set")
+        prompt = self._rephrase_query_prompt(query)
+        rephrases = self._cached_rewrite(prompt)
+        if rephrases is None:
+            with status("[cyan]LLM generating rephrases of query..."):
+                rephrases = (
+                    await self.llm_response_forget_async(prompt, stream=False)
+                ).content
+            self._cache_rewrite(prompt, rephrases)
+        return rephrases.split("\n\n")
+
+    def _rephrase_query_prompt(self, query: str) -> str:
+        return f"""
+            Rephrase the following query in {self.config.n_query_rephrases}
+            different equivalent ways, separate them with 2 newlines.
+            QUERY: {query}
+            """
+
+    def _rewrite_cache_key(self, prompt: str) -> str:
+        model = "" if self.llm is None else self.llm.config.chat_model
+        return hashlib.sha256(f"{model}|{prompt}".encode()).hexdigest()
+
+    def _rewrite_cache_db(self) -> CacheDB | None:
+        """The LLM's (persistent) response cache, if rewrites should use it"""
+        if not (self.config.llm_response_cache and settings.cache):
+            return None
+        return getattr(self.llm, "cache", None)
+
+    def _cached_rewrite(self, prompt: str) -> str | None:
+        """
+        LLM response to a query-rewriting prompt (HyDE, rephrase, stand-alone),
+        if cached, either in memory or in the LLM's response cache
+        """
+        if self.config.rewrite_cache_size <= 0:
+            return None
+        key = self._rewrite_cache_key(prompt)
+        if key in self.llm_rewrite_cache:
+            self.llm_rewrite_cache.move_to_end(key)
+            return self.llm_rewrite_cache[key]
+        cache_db = self._rewrite_cache_db()
+        if cache_db is None:
+            return None
+        try:
+            response = cache_db.retrieve(f"doc_chat_rewrite:{key}")
+        except Exception as e:
+            logger.error(f"Error retrieving cached query rewrite: {e}")
+            return None
+        if not isinstance(response, str) or response.strip() == "":
+            return None
+        self._cache_rewrite(prompt, response, persist=False)
+        return response
+
+    def _cache_rewrite(self, prompt: str, response: str, persist: bool = True) -> None:
+        """
+        Cache LLM response to a query-rewriting prompt, evicting LRU entries.
+        Empty responses (e.g. from a failed LLM call) are not cached,
+        so that the rewrite is retried next time.
+        """
+        if self.config.rewrite_cache_size <= 0 or response.strip() == "":
+            return
+        key = self._rewrite_cache_key(prompt)
+        self.llm_rewrite_cache[key] = response
+        while len(self.llm_rewrite_cache) > self.config.rewrite_cache_size:
+            self.llm_rewrite_cache.popitem(last=False)
+        cache_db = self._rewrite_cache_db() if persist else None
+        if cache_db is None:
+            return
+        try:
+            cache_db.store(f"doc_chat_rewrite:{key}", response)
+        except Exception as e:
+            logger.error(f"Error storing query rewrite in cache: {e}")
 
     def get_similar_chunks_bm25(
         self, query: str, multiple: int
@@ -897,6 +1229,7 @@ class DocChatAgent(ChatAgent):
                 self.chunked_docs_clean,  # already pre-processed!
                 query,
                 k=self.config.parsing.n_similar_docs * multiple,
+                bm25=self._ensure_bm25(),
             )
         return docs_scores
 
@@ -937,21 +1270,53 @@ class DocChatAgent(ChatAgent):
                     """
                 )
 
-            model = CrossEncoder(self.config.cross_encoder_reranking_model)
-            scores = model.predict([(query, p.content) for p in passages])
-            # Convert to [0,1] so we might could use a cutoff later.
-            scores = 1.0 / (1 + np.exp(-np.array(scores)))
-            # get top k scoring passages
-            sorted_pairs = sorted(
-                zip(scores, passages),
-                key=lambda x: x[0],
-                reverse=True,
+            spec = (
+                self.config.cross_encoder_reranking_model,
+                self.config.cross_encoder_backend,
+                self.config.cross_encoder_quantize,
             )
-            passages = [
-                d for _, d in sorted_pairs[: self.config.parsing.n_similar_docs]
-            ]
+            if self.cross_encoder is None or self.cross_encoder_spec != spec:
+                # load once, not on every query (unless the model is changed)
+                self.cross_encoder = self._load_cross_encoder(CrossEncoder)
+                self.cross_encoder_spec = spec
+            # "smart batching": predict on pairs sorted by passage length, so each
+            # batch is padded to a similar length, then restore the original order
+            order = np.argsort([len(p.content) for p in passages])
+            sorted_scores = self.cross_encoder.predict(
+                [(query, passages[i].content) for i in order],
+                batch_size=self.config.cross_encoder_batch_size,
+                show_progress_bar=False,
+            )
+            scores = np.empty(len(passages), dtype=np.float32)
+            scores[order] = sorted_scores
+            # get top k scoring passages (only the order matters here, so there
+            # is no need to map the raw scores to [0,1])
+            top = top_k_indices(scores, self.config.parsing.n_similar_docs)
+            passages = [passages[i] for i in top]
         return passages
 
+    def _load_cross_encoder(self, cross_encoder_cls: Any) -> Any:
+        """Load the configured cross-encoder, with the configured backend"""
+        model_name = self.config.cross_encoder_reranking_model
+        backend = self.config.cross_encoder_backend
+        if backend == "torch":
+            return cross_encoder_cls(model_name)
+        model_kwargs = (
+            {"file_name": "onnx/model_qint8_avx512.onnx"}
+            if backend == "onnx" and self.config.cross_encoder_quantize
+            else {}
+        )
+        # older sentence-transformers versions have no `backend` parameter
+        if "backend" not in inspect.signature(cross_encoder_cls).parameters:
+            logger.warning(
+                f"""
+                The installed sentence-transformers version does not support
+                the {backend} backend for cross-encoders; using torch instead.
+                """
+            )
+            return cross_encoder_cls(model_name)
+        return cross_encoder_cls(model_name, backend=backend, model_kwargs=model_kwargs)
+
     def rerank_with_diversity(self, passages: List[Document]) -> List[Document]:
         """
         Rerank a list of items in such a way that each successive item is least similar
@@ -968,32 +1333,38 @@ class DocChatAgent(ChatAgent):
         if self.vecdb is None:
             logger.warning("No vecdb; cannot use rerank_with_diversity")
             return passages
+        n = len(passages)
+        if n <= 1:
+            return passages
         emb_model = self.vecdb.embedding_model
-        emb_fn = emb_model.embedding_fn()
-        embs = emb_fn([p.content for p in passages])
-        embs_arr = [np.array(e) for e in embs]
-        indices = list(range(len(passages)))
-
-        # Helper function to compute average similarity to
-        # items in the current result list.
-        def avg_similarity_to_result(i: int, result: List[int]) -> float:
-            return sum(  # type: ignore
-                (embs_arr[i] @ embs_arr[j])
-                / (np.linalg.norm(embs_arr[i]) * np.linalg.norm(embs_arr[j]))
-                for j in result
-            ) / len(result)
-
-        # copy passages to items
-        result = [indices.pop(0)]  # Start with the first item.
-
-        while indices:
-            # Find the item that has the least average similarity
-            # to items in the result list.
-            least_similar_item = min(
-                indices, key=lambda i: avg_similarity_to_result(i, result)
-            )
-            result.append(least_similar_item)
-            indices.remove(least_similar_item)
+        if self.diversity_emb_fn is None or self.diversity_emb_model is not emb_model:
+            # create once, not on every query (unless the vecdb's model changes)
+            self.diversity_emb_fn = emb_model.embedding_fn()
+            self.diversity_emb_model = emb_model
+        embs = self.diversity_emb_fn([p.content for p in passages])
+        embs_arr = np.asarray(embs, dtype=np.float32)
+        embs_arr /= np.linalg.norm(embs_arr, axis=1, keepdims=True) + 1e-12
+        # For a moderate number of passages, compute cosine similarities between
+        # all pairs as one matrix product; beyond that, the n x n matrix gets
+        # large, so compute each selected item's similarities as they are needed.
+        sims = embs_arr @ embs_arr.T if n <= DIVERSITY_SIM_MATRIX_MAX_N else None
+
+        def similarities(i: int) -> np.ndarray:
+            return np.asarray(sims[i] if sims is not None else embs_arr @ embs_arr[i])
+
+        # Start with the first item; then repeatedly add the remaining item
+        # that has the least average similarity to items in the result list,
+        # maintaining the sum of similarities to the result list for each item.
+        result = [0]
+        sum_sims = similarities(0).copy()
+        remaining = np.ones(n, dtype=bool)
+        remaining[0] = False
+        for _ in range(n - 1):
+            # argmin of sum equals argmin of average, since all have same divisor
+            i = int(np.argmin(np.where(remaining, sum_sims, np.inf)))
+            result.append(i)
+            sum_sims += similarities(i)
+            remaining[i] = False
 
         # return passages in order of result list
         return [passages[i] for i in result]
@@ -1016,12 +1387,8 @@ class DocChatAgent(ChatAgent):
             List[Documents]: A reranked list of Documents.
 
         """
-        # Splitting items into odds and evens based on index, not value
-        odds = passages[::2]
-        evens = passages[1::2][::-1]
-
-        # Merging them back together
-        return odds + evens
+        # even indices in order, then odd indices in reverse
+        return [passages[i] for i in _periphery_permutation(len(passages))]
 
     def add_context_window(
         self,
@@ -1045,7 +1412,7 @@ class DocChatAgent(ChatAgent):
             return docs_scores
         if len(docs_scores) == 0:
             return []
-        if set(docs_scores[0][0].__fields__) != {"content", "metadata"}:
+        if not _has_only_content_and_metadata(type(docs_scores[0][0])):
             # Do not add context window when there are other fields besides just
             # content and metadata, since we do not know how to set those other fields
             # for newly created docs with combined content.
@@ -1082,6 +1449,30 @@ class DocChatAgent(ChatAgent):
             where=self.config.filter,
         )
 
+    def get_semantic_search_results_batch(
+        self,
+        queries: List[str],
+        k: int = 10,
+    ) -> List[List[Tuple[Document, float]]]:
+        """
+        Get semantic search results from vecdb, for each of several queries,
+        embedding all the queries in a single batch (where the vecdb supports it).
+        Args:
+            queries (List[str]): queries to get results for
+            k (int): number of results to return per query
+
+        Returns:
+            List[List[Tuple[Document, float]]]: for each query,
+                list of tuples of (document, score)
+        """
+        if self.vecdb is None:
+            raise ValueError("VecDB not set")
+        return self.vecdb.similar_texts_with_scores_batch(
+            queries,
+            k=k,
+            where=self.config.filter,
+        )
+
     def get_relevant_chunks(
         self, query: str, query_proxies: List[str] = []
     ) -> List[Document]:
@@ -1125,53 +1516,75 @@ class DocChatAgent(ChatAgent):
         if self.vecdb is None:
             raise ValueError("VecDB not set")
 
+        queries = [query] + query_proxies
+        k = self.config.parsing.n_similar_docs * retrieval_multiple
         with status("[cyan]Searching VecDB for relevant doc passages..."):
-            docs_and_scores: List[Tuple[Document, float]] = []
-            for q in [query] + query_proxies:
-                docs_and_scores += self.get_semantic_search_results(
-                    q,
-                    k=self.config.parsing.n_similar_docs * retrieval_multiple,
-                )
-                # sort by score descending
-                docs_and_scores = sorted(
-                    docs_and_scores, key=lambda x: x[1], reverse=True
-                )
-
-        # keep only docs with unique d.id()
-        id2_rank_semantic = {d.id(): i for i, (d, _) in enumerate(docs_and_scores)}
-        id2doc = {d.id(): d for d, _ in docs_and_scores}
+            # The lexical searches run in a shared pool, overlapped with the
+            # semantic search, which embeds the query and its proxies in one batch
+            executor = _lexical_search_executor()
+            bm25_future = (
+                executor.submit(self.get_similar_chunks_bm25, query, retrieval_multiple)
+                if self.config.use_bm25_search
+                else None
+            )
+            fuzzy_future = (
+                executor.submit(self.get_fuzzy_matches, query, retrieval_multiple)
+                if self.config.use_fuzzy_match
+                else None
+            )
+            docs_and_scores: List[Tuple[Document, float]] = [
+                ds
+                for results in self.get_semantic_search_results_batch(queries, k=k)
+                for ds in results
+            ]
+            bm25_docs_scores = [] if bm25_future is None else bm25_future.result()
+            fuzzy_match_doc_scores = (
+                [] if fuzzy_future is None else fuzzy_future.result()
+            )
+            # sort by score descending
+            docs_and_scores = sorted(docs_and_scores, key=lambda x: x[1], reverse=True)
+
+        # Merge the retrieved docs into a single id -> doc map (keeping the first
+        # occurrence of each id), computing each doc's id just once, and record
+        # the (best) rank of each id in each retrieval method's results.
+        id2doc: Dict[str, Document] = {}
+
+        def merge(docs_scores: List[Tuple[Document, float]]) -> Dict[str, int]:
+            id2rank: Dict[str, int] = {}
+            for i, (d, _) in enumerate(docs_scores):
+                id_ = d.id()
+                id2rank.setdefault(id_, i)
+                id2doc.setdefault(id_, d)
+            return id2rank
+
+        id2_rank_semantic = merge(docs_and_scores)
         # make sure we get unique docs
-        passages = [id2doc[id] for id, _ in id2_rank_semantic.items()]
+        passages = list(id2doc.values())
 
         id2_rank_bm25 = {}
         if self.config.use_bm25_search:
             # TODO: Add score threshold in config
-            docs_scores = self.get_similar_chunks_bm25(query, retrieval_multiple)
+            docs_scores = bm25_docs_scores
             if self.config.cross_encoder_reranking_model == "":
                 # only if we're not re-ranking with a cross-encoder,
                 # we collect these ranks for Reciprocal Rank Fusion down below.
                 docs_scores = sorted(docs_scores, key=lambda x: x[1], reverse=True)
-                id2_rank_bm25 = {d.id(): i for i, (d, _) in enumerate(docs_scores)}
-                id2doc.update({d.id(): d for d, _ in docs_scores})
-            else:
-                passages += [d for (d, _) in docs_scores]
+            id2_rank_bm25 = merge(docs_scores)
 
         id2_rank_fuzzy = {}
         if self.config.use_fuzzy_match:
             # TODO: Add score threshold in config
-            fuzzy_match_doc_scores = self.get_fuzzy_matches(query, retrieval_multiple)
             if self.config.cross_encoder_reranking_model == "":
                 # only if we're not re-ranking with a cross-encoder,
                 # we collect these ranks for Reciprocal Rank Fusion down below.
                 fuzzy_match_doc_scores = sorted(
                     fuzzy_match_doc_scores, key=lambda x: x[1], reverse=True
                 )
-                id2_rank_fuzzy = {
-                    d.id(): i for i, (d, _) in enumerate(fuzzy_match_doc_scores)
-                }
-                id2doc.update({d.id(): d for d, _ in fuzzy_match_doc_scores})
-            else:
-                passages += [d for (d, _) in fuzzy_match_doc_scores]
+            id2_rank_fuzzy = merge(fuzzy_match_doc_scores)
+
+        if self.config.cross_encoder_reranking_model != "":
+            # the cross-encoder re-ranks the union of all retrieved docs
+            passages = list(id2doc.values())
 
         if (
             self.config.cross_encoder_reranking_model == ""
@@ -1279,9 +1692,14 @@ class DocChatAgent(ChatAgent):
             # Regardless of whether we are in conversation mode or not,
             # for relevant doc/chunk extraction, we must convert the query
             # to a standalone query to get more relevant results.
-            with status("[cyan]Converting to stand-alone query...[/cyan]"):
-                with StreamingIfAllowed(self.llm, False):
-                    query = self.llm.followup_to_standalone(self.dialog, query)
+            prompt = LanguageModel.followup_to_standalone_prompt(self.dialog, query)
+            standalone = self._cached_rewrite(prompt)
+            if standalone is None:
+                with status("[cyan]Converting to stand-alone query...[/cyan]"):
+                    with StreamingIfAllowed(self.llm, False):
+                        standalone = self.llm.followup_to_standalone(self.dialog, query)
+                self._cache_rewrite(prompt, standalone)
+            query = standalone
             print(f"[orange2]New query: {query}")
 
         proxies = []
@@ -1306,6 +1724,49 @@ class DocChatAgent(ChatAgent):
 
         return query, extracts
 
+    @no_type_check
+    async def get_relevant_extracts_async(
+        self, query: str
+    ) -> Tuple[str, List[Document]]:
+        """
+        Async version of `get_relevant_extracts`. See there for details.
+        LLM calls are awaited, and the (sync, CPU/vecdb-bound) retrieval
+        stage is run in a worker thread, so the event loop is never blocked.
+        """
+        if len(self.dialog) > 0 and not self.config.assistant_mode:
+            prompt = LanguageModel.followup_to_standalone_prompt(self.dialog, query)
+            standalone = self._cached_rewrite(prompt)
+            if standalone is None:
+                with status("[cyan]Converting to stand-alone query...[/cyan]"):
+                    with StreamingIfAllowed(self.llm, False):
+                        standalone = await self.llm.followup_to_standalone_async(
+                            self.dialog, query
+                        )
+                self._cache_rewrite(prompt, standalone)
+            query = standalone
+            print(f"[orange2]New query: {query}")
+
+        proxies = []
+        if self.config.hypothetical_answer:
+            answer = await self.llm_hypothetical_answer_async(query)
+            proxies = [answer]
+
+        if self.config.n_query_rephrases > 0:
+            rephrases = await self.llm_rephrase_query_async(query)
+            proxies += rephrases
+
+        passages = await asyncio.to_thread(self.get_relevant_chunks, query, proxies)
+
+        if len(passages) == 0:
+            return query, []
+
+        with status("[cyan]LLM Extracting verbatim passages..."):
+            with StreamingIfAllowed(self.llm, False):
+                extracts = await self.get_verbatim_extracts_async(query, passages)
+                extracts = [e for e in extracts if e.content != NO_ANSWER]
+
+        return query, extracts
+
     def get_verbatim_extracts(
         self,
         query: str,
@@ -1321,10 +1782,67 @@ class DocChatAgent(ChatAgent):
         Returns:
             List[Document]: list of Documents containing extracts and metadata.
         """
-        agent_cfg = self.config.relevance_extractor_config
-        if agent_cfg is None:
+        task = self._relevance_extractor_task(query)
+        if task is None:
             # no relevance extraction: simply return passages
             return passages
+
+        # run_batch_tasks uses asyncio.run, which fails inside a running loop
+        apply_nest_asyncio()
+        concurrency = self.config.extraction_concurrency
+        extracts: list[str] = run_batch_tasks(
+            task,
+            passages,
+            input_map=lambda msg: msg.content,
+            output_map=lambda ans: ans.content if ans is not None else NO_ANSWER,
+            sequential=concurrency <= 1,
+            batch_size=concurrency if concurrency > 1 else None,
+        )  # type: ignore
+
+        return self._passage_extracts(passages, extracts)
+
+    async def get_verbatim_extracts_async(
+        self,
+        query: str,
+        passages: List[Document],
+    ) -> List[Document]:
+        """
+        Async version of `get_verbatim_extracts`: the extraction tasks run
+        concurrently on the running event loop, with at most
+        `config.extraction_concurrency` LLM extractions in flight at a time.
+        """
+        task = self._relevance_extractor_task(query)
+        if task is None:
+            return passages
+
+        semaphore = asyncio.Semaphore(max(1, self.config.extraction_concurrency))
+
+        async def _extract(i: int, passage: Document) -> Tuple[int, str]:
+            async with semaphore:
+                task_i = task.clone(i)
+                if task_i.agent.llm is not None:
+                    task_i.agent.llm.set_stream(False)
+                task_i.agent.config.show_stats = False
+                result = await task_i.run_async(passage.content)
+            return i, result.content if result is not None else NO_ANSWER
+
+        # collect extracts as they complete, keeping them in passage order
+        extracts = [NO_ANSWER] * len(passages)
+        for next_extract in asyncio.as_completed(
+            [_extract(i, p) for i, p in enumerate(passages)]
+        ):
+            i, extract = await next_extract
+            extracts[i] = extract
+        return self._passage_extracts(passages, extracts)
+
+    def _relevance_extractor_task(self, query: str) -> Task | None:
+        """
+        Set up the RelevanceExtractorAgent task for the given query,
+        or None if relevance extraction is disabled.
+        """
+        agent_cfg = self.config.relevance_extractor_config
+        if agent_cfg is None:
+            return None
         if agent_cfg.llm is None:
             # Use main DocChatAgent's LLM if not provided explicitly:
             # this reduces setup burden on the user
@@ -1334,19 +1852,16 @@ class DocChatAgent(ChatAgent):
         agent_cfg.llm.stream = False  # disable streaming for concurrent calls
 
         agent = RelevanceExtractorAgent(agent_cfg)
-        task = Task(
+        return Task(
             agent,
             name="Relevance-Extractor",
             interactive=False,
         )
 
-        extracts: list[str] = run_batch_tasks(
-            task,
-            passages,
-            input_map=lambda msg: msg.content,
-            output_map=lambda ans: ans.content if ans is not None else NO_ANSWER,
-        )  # type: ignore
-
+    @staticmethod
+    def _passage_extracts(
+        passages: List[Document], extracts: List[str]
+    ) -> List[Document]:
         # Caution: Retain ALL other fields in the Documents (which could be
         # other than just `content` and `metadata`), while simply replacing
         # `content` with the extracted portions
@@ -1384,22 +1899,50 @@ class DocChatAgent(ChatAgent):
         if self.llm is None:
             raise ValueError("LLM not set")
         if self.config.retrieve_only:
-            # only return extracts, skip LLM-based summary answer
-            meta = dict(
-                sender=Entity.LLM,
-            )
-            # copy metadata from first doc, unclear what to do here.
-            meta.update(extracts[0].metadata)
-            return ChatDocument(
-                content="\n\n".join([e.content for e in extracts]),
-                metadata=ChatDocMetaData(**meta),  # type: ignore
-            )
+            return self._retrieve_only_response(extracts)
         response = self.get_summary_answer(query, extracts)
 
         self.update_dialog(query, response.content)
         self.response = response  # save last response
         return response
 
+    async def answer_from_docs_async(self, query: str) -> ChatDocument:
+        """
+        Async version of `answer_from_docs`. See there for details.
+        """
+        response = ChatDocument(
+            content=NO_ANSWER,
+            metadata=ChatDocMetaData(
+                source="None",
+                sender=Entity.LLM,
+            ),
+        )
+        query, extracts = await self.get_relevant_extracts_async(query)
+        if len(extracts) == 0:
+            return response
+        if self.llm is None:
+            raise ValueError("LLM not set")
+        if self.config.retrieve_only:
+            return self._retrieve_only_response(extracts)
+        response = await self.get_summary_answer_async(query, extracts)
+
+        self.update_dialog(query, response.content)
+        self.response = response  # save last response
+        return response
+
+    @staticmethod
+    def _retrieve_only_response(extracts: List[Document]) -> ChatDocument:
+        # only return extracts, skip LLM-based summary answer
+        meta = dict(
+            sender=Entity.LLM,
+        )
+        # copy metadata from first doc, unclear what to do here.
+        meta.update(extracts[0].metadata)
+        return ChatDocument(
+            content="\n\n".join([e.content for e in extracts]),
+            metadata=ChatDocMetaData(**meta),  # type: ignore
+        )
+
     def summarize_docs(
         self,
         instruction: str = "Give a concise summary of the following text:",
@@ -1417,23 +1960,37 @@ class DocChatAgent(ChatAgent):
                 """
             )
             return None
-        full_text = "\n\n".join([d.content for d in self.original_docs])
         if self.parser is None:
             raise ValueError("No parser defined")
-        tot_tokens = self.parser.num_tokens(full_text)
         MAX_INPUT_TOKENS = (
             self.llm.completion_context_length()
             - self.config.llm.max_output_tokens
             - 100
         )
-        if tot_tokens > MAX_INPUT_TOKENS:
-            # truncate
-            full_text = self.parser.tokenizer.decode(
-                self.parser.tokenizer.encode(full_text)[:MAX_INPUT_TOKENS]
-            )
+        # Tokenize doc by doc, keeping docs until the token budget is used up,
+        # so we never tokenize (or decode) more text than we can use.
+        budget = MAX_INPUT_TOKENS
+        sep_tokens = self.parser.num_tokens("\n\n")
+        texts: List[str] = []
+        truncated = False
+        for d in self.original_docs:
+            if budget <= 0:
+                # budget used up: drop the remaining docs
+                truncated = True
+                break
+            tokens = self.parser.tokenizer.encode(d.content)
+            if len(tokens) > budget:
+                # truncate
+                texts.append(self.parser.tokenizer.decode(tokens[:budget]))
+                truncated = True
+                break
+            texts.append(d.content)
+            budget -= len(tokens) + sep_tokens
+        if truncated:
             logger.warning(
                 f"Summarizing after truncating text to {MAX_INPUT_TOKENS} tokens"
             )
+        full_text = "\n\n".join(texts)
         prompt = f"""
         {instruction}
 
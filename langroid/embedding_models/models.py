@@ -10,7 +10,7 @@ from openai import OpenAI
 from langroid.embedding_models.base import EmbeddingModel, EmbeddingModelsConfig
 from langroid.exceptions import LangroidImportError
 from langroid.mytypes import Embeddings
-from langroid.parsing.utils import batched
+from langroid.parsing.utils import batched_by_size
 
 
 class OpenAIEmbeddingsConfig(EmbeddingModelsConfig):
@@ -21,6 +21,8 @@ class OpenAIEmbeddingsConfig(EmbeddingModelsConfig):
     organization: str = ""
     dims: int = 1536
     context_length: int = 8192
+    # max total tokens of the texts sent in a single embeddings API request
+    max_tokens_per_batch: int = 250_000
 
 
 class SentenceTransformerEmbeddingsConfig(EmbeddingModelsConfig):
@@ -81,7 +83,9 @@ class EmbeddingFunctionCallable:
 
         This method:
         - Truncates each text in the input list to the model's maximum context length.
-        - Processes the texts in batches to generate embeddings efficiently.
+        - Processes the texts in batches to generate embeddings efficiently,
+        where each batch has at most `batch_size` texts and at most
+        `max_tokens_per_batch` tokens in total.
         - Automatically retries the embedding generation process with exponential
         backoff in case of failures.
 
@@ -93,7 +97,11 @@ class EmbeddingFunctionCallable:
         """
         tokenized_texts = self.model.truncate_texts(input)
         embeds = []
-        for batch in batched(tokenized_texts, self.batch_size):
+        for batch in batched_by_size(
+            tokenized_texts,
+            self.batch_size,
+            self.model.config.max_tokens_per_batch,
+        ):
             result = self.model.client.embeddings.create(
                 input=batch, model=self.model.config.model_name
             )
@@ -184,12 +192,15 @@ class SentenceTransformerEmbeddings(EmbeddingModel):
                     batch_size=self.config.batch_size,
                 ).tolist()
             else:
-                embeds = []
-                for batch in batched(texts, self.config.batch_size):
-                    batch_embeds = self.model.encode(
-                        batch, convert_to_numpy=True
-                    ).tolist()  # type: ignore
-                    embeds.extend(batch_embeds)
+                # let `encode` do the batching internally, in a single call:
+                # this avoids per-batch python overhead, and lets the model
+                # sort texts by length to minimize padding within batches.
+                embeds = self.model.encode(
+                    texts,
+                    batch_size=self.config.batch_size,
+                    convert_to_numpy=True,
+                    show_progress_bar=False,
+                ).tolist()  # type: ignore
 
             return embeds
 
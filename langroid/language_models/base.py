@@ -596,9 +596,36 @@ class LanguageModel(ABC):
 
         Returns: standalone version of the question
         """
+        prompt = self.followup_to_standalone_prompt(chat_history, question)
+        show_if_debug(prompt, "FOLLOWUP->STANDALONE-PROMPT= ")
+        standalone = self.generate(prompt=prompt, max_tokens=1024).message.strip()
+        show_if_debug(prompt, "FOLLOWUP->STANDALONE-RESPONSE= ")
+        return standalone
+
+    async def followup_to_standalone_async(
+        self, chat_history: List[Tuple[str, str]], question: str
+    ) -> str:
+        """
+        Async version of `followup_to_standalone`. See there for details.
+        """
+        prompt = self.followup_to_standalone_prompt(chat_history, question)
+        show_if_debug(prompt, "FOLLOWUP->STANDALONE-PROMPT= ")
+        response = await self.agenerate(prompt=prompt, max_tokens=1024)
+        standalone = response.message.strip()
+        show_if_debug(prompt, "FOLLOWUP->STANDALONE-RESPONSE= ")
+        return standalone
+
+    @staticmethod
+    def followup_to_standalone_prompt(
+        chat_history: List[Tuple[str, str]], question: str
+    ) -> str:
+        """
+        Prompt used by `followup_to_standalone` to convert a follow-up question
+        into a standalone question, given the chat history.
+        """
         history = collate_chat_history(chat_history)
 
-        prompt = f"""
+        return f"""
         Given the CHAT HISTORY below, and a follow-up QUESTION or SEARCH PHRASE,
         rephrase the follow-up question/phrase as a STANDALONE QUESTION that
         can be understood without the context of the chat history.
@@ -607,10 +634,6 @@ class LanguageModel(ABC):
         
         Follow-up question: {question} 
         """.strip()
-        show_if_debug(prompt, "FOLLOWUP->STANDALONE-PROMPT= ")
-        standalone = self.generate(prompt=prompt, max_tokens=1024).message.strip()
-        show_if_debug(prompt, "FOLLOWUP->STANDALONE-RESPONSE= ")
-        return standalone
 
 
 class StreamingIfAllowed:
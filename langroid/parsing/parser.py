@@ -288,7 +288,7 @@ class Parser:
         # create ids in metadata of docs if absent:
         # we need this to distinguish docs later in add_window_ids
         for d in docs:
-            if d.metadata.id in [None, ""]:
+            if not d.metadata.id:
                 d.metadata.id = ObjectRegistry.new_id()
         # some docs are already splits, so don't split them further!
         chunked_docs = [d for d in docs if d.metadata.is_chunk]
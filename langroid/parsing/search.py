@@ -7,8 +7,10 @@ See tests for examples: tests/main/test_string_search.py
 """
 
 import difflib
-from typing import List, Tuple
+from functools import cache, lru_cache
+from typing import Callable, List, Set, Tuple
 
+import numpy as np
 from nltk.corpus import stopwords
 from nltk.stem import WordNetLemmatizer
 from nltk.tokenize import RegexpTokenizer
@@ -47,21 +49,18 @@ def find_fuzzy_matches_in_docs(
     """
     if len(docs) == 0:
         return []
-    best_matches = process.extract(
+    # pass choices keyed by position, so each match comes back with the index
+    # of its doc, rather than having to scan the docs for the matched text;
+    # the top-k selection (and score cutoff) is done by `extract` itself.
+    best_matches = process.extractBests(
         query,
-        [d.content for d in docs_clean],
+        {i: d.content for i, d in enumerate(docs_clean)},
         limit=k,
         scorer=fuzz.partial_ratio,
+        score_cutoff=50,
     )
-
-    real_matches = [(m, score) for m, score in best_matches if score > 50]
-    # find the original docs that corresponding to the matches
-    orig_doc_matches = []
-    for i, (m, s) in enumerate(real_matches):
-        for j, doc_clean in enumerate(docs_clean):
-            if m in doc_clean.content:
-                orig_doc_matches.append((docs[j], s))
-                break
+    # find the original docs that correspond to the matches
+    orig_doc_matches = [(docs[j], s) for _, s, j in best_matches if s > 50]
     if words_after is None and words_before is None:
         return orig_doc_matches
     if len(orig_doc_matches) == 0:
@@ -101,6 +100,24 @@ def find_fuzzy_matches_in_docs(
     return contextual_matches
 
 
+@cache
+def _nltk_text_tools() -> Tuple[RegexpTokenizer, Set[str], Callable[[str], str]]:
+    """
+    Construct (once) the tokenizer, stopword set and lemmatizer used by
+    `preprocess_text`, since building these on every call dominates the cost
+    of preprocessing a large number of short texts.
+    The lemmatizer is memoized per word, since vocabularies repeat heavily
+    across chunks of a corpus.
+    """
+    # Ensure the NLTK resources are available
+    for resource in ["punkt", "wordnet", "stopwords"]:
+        download_nltk_resource(resource)
+    tokenizer = RegexpTokenizer(r"\w+")
+    stop_words = set(stopwords.words("english"))
+    lemmatize = lru_cache(maxsize=100_000)(WordNetLemmatizer().lemmatize)
+    return tokenizer, stop_words, lemmatize
+
+
 def preprocess_text(text: str) -> str:
     """
     Preprocesses the given text by:
@@ -116,29 +133,28 @@ def preprocess_text(text: str) -> str:
     Returns:
         str: The preprocessed text.
     """
-    # Ensure the NLTK resources are available
-    for resource in ["punkt", "wordnet", "stopwords"]:
-        download_nltk_resource(resource)
+    tokenizer, stop_words, lemmatize = _nltk_text_tools()
 
-    # Lowercase the text
-    text = text.lower()
+    # Lowercase the text, tokenize it and remove punctuation
+    tokens = tokenizer.tokenize(text.lower())
 
-    # Tokenize the text and remove punctuation
-    tokenizer = RegexpTokenizer(r"\w+")
-    tokens = tokenizer.tokenize(text)
+    # Remove stopwords and lemmatize words,
+    # then join the words back into a string
+    return " ".join(lemmatize(t) for t in tokens if t not in stop_words)
 
-    # Remove stopwords
-    stop_words = set(stopwords.words("english"))
-    tokens = [t for t in tokens if t not in stop_words]
 
-    # Lemmatize words
-    lemmatizer = WordNetLemmatizer()
-    tokens = [lemmatizer.lemmatize(t) for t in tokens]
+def build_bm25_index(docs_clean: List[Document]) -> BM25Okapi:
+    """
+    Build a BM25 index over a list of cleaned (pre-processed) Documents,
+    to be reused across calls to `find_closest_matches_with_bm25`.
 
-    # Join the words back into a string
-    text = " ".join(tokens)
+    Args:
+        docs_clean (List[Document]): List of cleaned Documents
 
-    return text
+    Returns:
+        BM25Okapi: the BM25 index
+    """
+    return BM25Okapi([doc.content.split() for doc in docs_clean])
 
 
 def find_closest_matches_with_bm25(
@@ -146,6 +162,7 @@ def find_closest_matches_with_bm25(
     docs_clean: List[Document],
     query: str,
     k: int = 5,
+    bm25: BM25Okapi | None = None,
 ) -> List[Tuple[Document, float]]:
     """
     Finds the k closest approximate matches using the BM25 algorithm.
@@ -155,28 +172,51 @@ def find_closest_matches_with_bm25(
         docs_clean (List[Document]): List of cleaned Documents
         query (str): The search query.
         k (int, optional): Number of matches to retrieve. Defaults to 5.
+        bm25 (BM25Okapi, optional): index previously built over `docs_clean`
+            with `build_bm25_index`; if None, one is built for this call.
 
     Returns:
         List[Tuple[Document,float]]: List of (Document, score) tuples.
     """
     if len(docs) == 0:
         return []
-    texts = [doc.content for doc in docs_clean]
     query = preprocess_text(query)
 
-    text_words = [text.split() for text in texts]
-
-    bm25 = BM25Okapi(text_words)
+    if bm25 is None:
+        bm25 = build_bm25_index(docs_clean)
     query_words = query.split()
     doc_scores = bm25.get_scores(query_words)
 
-    # Get indices of top k scores
-    top_indices = sorted(range(len(doc_scores)), key=lambda i: -doc_scores[i])[:k]
+    top_indices = top_k_indices(doc_scores, k)
 
     # return the original docs, based on the scores from cleaned docs
     return [(docs[i], doc_scores[i]) for i in top_indices]
 
 
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Indices of the k highest scores, in descending order of score, with ties
+    broken by position (as in a full stable sort). Selects in O(n), then sorts
+    just the top k.
+
+    Args:
+        scores (np.ndarray): 1-d array of scores.
+        k (int): Number of indices to return.
+
+    Returns:
+        np.ndarray: Indices of the (at most) k highest scores.
+    """
+    scores = np.asarray(scores)
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.array([], dtype=np.intp)
+    kth_score = -np.partition(-scores, k - 1)[k - 1]
+    above = np.flatnonzero(scores > kth_score)
+    ties = np.flatnonzero(scores == kth_score)[: k - len(above)]
+    top = np.concatenate([above, ties])
+    return top[np.lexsort((top, -scores[top]))]
+
+
 def get_context(
     query: str,
     text: str,
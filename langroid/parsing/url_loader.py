@@ -89,7 +89,14 @@ class URLLoader:
                         doc_parser = DocumentParser.create(
                             temp_file_path, self.parser.config
                         )
-                        docs.extend(doc_parser.get_doc_chunks())
+                        new_chunks = doc_parser.get_doc_chunks()
+                        # the temp file is deleted below, so record the url
+                        # (rather than the temp file) as the source of the chunks
+                        for chunk in new_chunks:
+                            chunk.metadata.source = chunk.metadata.source.replace(
+                                temp_file_path, url
+                            )
+                        docs.extend(new_chunks)
                         # Clean up the temporary file
                         os.remove(temp_file_path)
                     else:
@@ -4,7 +4,7 @@ import random
 import re
 from functools import cache
 from itertools import islice
-from typing import Iterable, List, Sequence, TypeVar
+from typing import Callable, Iterable, List, Sequence, TypeVar
 
 import nltk
 from faker import Faker
@@ -44,6 +44,33 @@ def batched(iterable: Iterable[T], n: int) -> Iterable[Sequence[T]]:
         yield batch
 
 
+def batched_by_size(
+    iterable: Iterable[T],
+    n: int,
+    max_size: int,
+    size: Callable[[T], int] = len,  # type: ignore
+) -> Iterable[Sequence[T]]:
+    """
+    Lazily batch data into tuples of at most n items, whose total `size`
+    (e.g. number of tokens) is at most max_size, preserving order.
+    An item that is by itself larger than max_size forms its own batch.
+    """
+    # batched_by_size(["ab", "c", "de", "f"], 3, 3) --> ("ab", "c") ("de", "f")
+    if n < 1:
+        raise ValueError("n must be at least one")
+    batch: List[T] = []
+    batch_size = 0
+    for item in iterable:
+        item_size = size(item)
+        if len(batch) > 0 and (len(batch) == n or batch_size + item_size > max_size):
+            yield tuple(batch)
+            batch, batch_size = [], 0
+        batch.append(item)
+        batch_size += item_size
+    if len(batch) > 0:
+        yield tuple(batch)
+
+
 def generate_random_sentences(k: int) -> str:
     # Load the sample text
     download_nltk_resource("gutenberg")
@@ -1,3 +1,9 @@
+import re
+
+# markdown footnote references, e.g. [^3]
+MARKDOWN_REFERENCE_RE = re.compile(r"\[\^(\d+)\]")
+
+
 def extract_markdown_references(md_string: str) -> list[int]:
     """
     Extracts markdown references (e.g., [^1], [^2]) from a string and returns
@@ -9,12 +15,9 @@ def extract_markdown_references(md_string: str) -> list[int]:
     Returns:
         list[int]: A sorted list of unique integers from the markdown references.
     """
-    import re
-
-    # Regex to find all occurrences of [^<number>]
-    matches = re.findall(r"\[\^(\d+)\]", md_string)
-    # Convert matches to integers, remove duplicates with set, and sort
-    return sorted(set(int(match) for match in matches))
+    # single scan for all occurrences of [^<number>], converted to integers,
+    # with duplicates removed, then sorted
+    return sorted({int(m) for m in MARKDOWN_REFERENCE_RE.findall(md_string)})
 
 
 def format_footnote_text(content: str, width: int = 80) -> str:
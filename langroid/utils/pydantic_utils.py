@@ -232,6 +232,28 @@ def flatten_pydantic_instance(
     return flat_data
 
 
+def model_to_builtins(obj: Any) -> Any:
+    """
+    Recursively convert a (possibly nested) Pydantic instance to builtin
+    dicts/lists, reading `__dict__` directly. Gives the same result as
+    `instance.dict()` (with default args) but is several times faster, which
+    matters when serializing large numbers of Documents for vecdb ingestion.
+
+    Args:
+        obj (Any): Pydantic instance, or a dict/list/tuple possibly containing them
+
+    Returns:
+        Any: the converted object (non-container values are returned as-is)
+    """
+    if isinstance(obj, BaseModel):
+        return {k: model_to_builtins(v) for k, v in obj.__dict__.items()}
+    if isinstance(obj, dict):
+        return {k: model_to_builtins(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(model_to_builtins(v) for v in obj)
+    return obj
+
+
 def extract_fields(doc: BaseModel, fields: List[str]) -> Dict[str, Any]:
     """
     Extract specified fields from a Pydantic object.
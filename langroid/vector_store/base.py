@@ -1,7 +1,17 @@
 import copy
 import logging
 from abc import ABC, abstractmethod
-from typing import Dict, List, Optional, Sequence, Tuple, Type
+from typing import (
+    Any,
+    Dict,
+    Generator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Type,
+)
 
 import numpy as np
 import pandas as pd
@@ -15,7 +25,7 @@ from langroid.utils.configuration import settings
 from langroid.utils.object_registry import ObjectRegistry
 from langroid.utils.output.printing import print_long_text
 from langroid.utils.pandas_utils import stringify
-from langroid.utils.pydantic_utils import flatten_dict
+from langroid.utils.pydantic_utils import extract_fields, flatten_dict
 
 logger = logging.getLogger(__name__)
 
@@ -167,7 +177,7 @@ class VectorStore(ABC):
         """Add ids to metadata if absent, since some
         vecdbs don't like having blank ids."""
         for d in documents:
-            if d.metadata.id in [None, ""]:
+            if not d.metadata.id:
                 d.metadata.id = ObjectRegistry.new_id()
 
     @abstractmethod
@@ -192,6 +202,29 @@ class VectorStore(ABC):
         """
         pass
 
+    def similar_texts_with_scores_batch(
+        self,
+        texts: List[str],
+        k: int = 1,
+        where: Optional[str] = None,
+    ) -> List[List[Tuple[Document, float]]]:
+        """
+        Find k most similar texts to each of the given texts. Subclasses may
+        override this to embed all the texts in a single batch, and/or to
+        search for them in a single request; by default the texts are
+        searched one at a time.
+
+        Args:
+            texts (List[str]): The texts to find similar texts for.
+            k (int, optional): Number of similar texts to retrieve per text.
+            where (Optional[str], optional): Where clause to filter the search.
+
+        Returns:
+            List[List[Tuple[Document,float]]]: for each text, a list of
+                (Document, score) tuples.
+        """
+        return [self.similar_texts_with_scores(t, k=k, where=where) for t in texts]
+
     def add_context_window(
         self, docs_scores: List[Tuple[Document, float]], neighbors: int = 0
     ) -> List[Tuple[Document, float]]:
@@ -331,6 +364,45 @@ class VectorStore(ABC):
         """
         pass
 
+    def stream_documents(
+        self, where: str = "", batch_size: int = 4096
+    ) -> Generator[List[Document], None, None]:
+        """
+        Yield all documents in the current collection, possibly filtered by
+        `where`, in batches of up to `batch_size` documents.
+        Vecdbs that can page through a collection should override this,
+        so that all documents need not be held in memory at once.
+        """
+        docs = self.get_all_documents(where=where)
+        for i in range(0, len(docs), batch_size):
+            yield docs[i : i + batch_size]
+
+    def distinct_field_values(self, fields: List[str]) -> Dict[str, Set[Any]]:
+        """
+        Get the set of distinct values of each of the given fields, across all
+        documents in the current collection.
+        Vecdbs that store fields in columnar form should override this to
+        compute distinct values without materializing all documents.
+
+        Args:
+            fields (List[str]): field names, possibly dotted,
+                e.g. "metadata.genre", or just "genre"
+                (see `langroid.utils.pydantic_utils.extract_fields`)
+
+        Returns:
+            Dict[str, Set[Any]]: field name -> set of distinct values
+        """
+        field_values: Dict[str, Set[Any]] = {f: set() for f in fields}
+        for batch in self.stream_documents():
+            for d in batch:
+                doc_field_vals = extract_fields(d, fields)
+                # the `field` returned by extract_fields may contain only the last
+                # part of the field name, e.g. "genre" instead of "metadata.genre",
+                # so we use the orig_field name to fill in the values
+                for (field, val), orig_field in zip(doc_field_vals.items(), fields):
+                    field_values[orig_field].add(val)
+        return field_values
+
     @abstractmethod
     def get_documents_by_ids(self, ids: List[str]) -> List[Document]:
         """
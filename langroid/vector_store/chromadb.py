@@ -164,35 +164,50 @@ class ChromaDB(VectorStore):
     def similar_texts_with_scores(
         self, text: str, k: int = 1, where: Optional[str] = None
     ) -> List[Tuple[Document, float]]:
+        return self.similar_texts_with_scores_batch([text], k=k, where=where)[0]
+
+    def similar_texts_with_scores_batch(
+        self, texts: List[str], k: int = 1, where: Optional[str] = None
+    ) -> List[List[Tuple[Document, float]]]:
+        """
+        Find k most similar texts to each of the given texts, in a single
+        query (which embeds all the texts in one batch).
+        """
+        if len(texts) == 0:
+            return []
         n = self.collection.count()
         filter = json.loads(where) if where else None
         results = self.collection.query(
-            query_texts=[text],
+            query_texts=texts,
             n_results=min(n, k),
             where=filter,
             include=["documents", "distances", "metadatas"],
         )
-        docs = self._docs_from_results(results)
-        # chroma distances are 1 - cosine.
-        scores = [1 - s for s in results["distances"][0]]
-        return list(zip(docs, scores))
-
-    def _docs_from_results(self, results: Dict[str, Any]) -> List[Document]:
+        docs_scores = []
+        for i in range(len(texts)):
+            docs = self._docs_from_results(results, i)
+            # chroma distances are 1 - cosine.
+            scores = [1 - s for s in results["distances"][i]]
+            docs_scores.append(list(zip(docs, scores)))
+        return docs_scores
+
+    def _docs_from_results(self, results: Dict[str, Any], i: int = 0) -> List[Document]:
         """
         Helper function to convert results from ChromaDB to a list of Documents
         Args:
             results (dict): results from ChromaDB
+            i (int): index of the query whose results to convert
 
         Returns:
             List[Document]: list of Documents
         """
-        if len(results["documents"][0]) == 0:
+        if len(results["documents"][i]) == 0:
             return []
-        contents = results["documents"][0]
+        contents = results["documents"][i]
         if settings.debug:
-            for i, c in enumerate(contents):
-                print_long_text("red", "italic red", f"MATCH-{i}", c)
-        metadatas = results["metadatas"][0]
+            for j, c in enumerate(contents):
+                print_long_text("red", "italic red", f"MATCH-{j}", c)
+        metadatas = results["metadatas"][i]
         for m in metadatas:
             # restore the stringified list of window_ids into the original List[str]
             if m["window_ids"].strip() == "":
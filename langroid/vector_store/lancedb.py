@@ -9,6 +9,7 @@ from typing import (
     List,
     Optional,
     Sequence,
+    Set,
     Tuple,
     Type,
 )
@@ -19,6 +20,7 @@ from dotenv import load_dotenv
 from langroid.pydantic_v1 import BaseModel, ValidationError, create_model
 
 if TYPE_CHECKING:
+    import pyarrow as pa
     from lancedb.query import LanceVectorQueryBuilder
 
 from langroid.embedding_models.base import (
@@ -29,9 +31,11 @@ from langroid.embedding_models.models import OpenAIEmbeddingsConfig
 from langroid.exceptions import LangroidImportError
 from langroid.mytypes import Document, EmbeddingFunction
 from langroid.utils.configuration import settings
+from langroid.utils.object_registry import ObjectRegistry
 from langroid.utils.pydantic_utils import (
     dataframe_to_document_model,
     dataframe_to_documents,
+    model_to_builtins,
 )
 from langroid.vector_store.base import VectorStore, VectorStoreConfig
 
@@ -52,6 +56,21 @@ class LanceDBConfig(VectorStoreConfig):
     storage_path: str = ".lancedb/data"
     embedding: EmbeddingModelsConfig = OpenAIEmbeddingsConfig()
     distance: str = "cosine"
+    # Approximate-nearest-neighbor (IVF-PQ) index settings.
+    # Without an index, LanceDB does an exhaustive (flat) search,
+    # which is fine for small collections, but slow for 100K+ vectors.
+    # Build the ANN index after adding docs? It is built only once, when a
+    # collection without an index first has at least `index_min_rows` rows;
+    # to rebuild it (e.g. after many more docs are added) call `create_index()`.
+    create_index: bool = False
+    index_min_rows: int = 10_000
+    index_num_partitions: int = 256  # num IVF partitions
+    index_num_sub_vectors: int = 96  # num PQ sub-vectors; must divide embedding dim
+    # query-time settings, only used when an ANN index exists:
+    # more probes => better recall but slower search
+    search_nprobes: int = 20
+    # re-rank refine_factor * k candidates using full vectors; None => no refine
+    search_refine_factor: int | None = None
 
 
 class LanceDB(VectorStore):
@@ -228,7 +247,7 @@ class LanceDB(VectorStore):
                     dict(
                         id=ids[i + j],
                         vector=embedding_vecs[i + j],
-                        **doc.dict(),
+                        **model_to_builtins(doc),
                     )
                     for j, doc in enumerate(documents[i : i + b])
                 ]
@@ -257,6 +276,57 @@ class LanceDB(VectorStore):
                 {self.config.storage_path} and try again.
                 """
             )
+            return
+        self._maybe_create_index(coll_name)
+
+    def create_index(
+        self, collection_name: str | None = None, replace: bool = True
+    ) -> None:
+        """
+        (Re)build the IVF-PQ ANN index on the vectors of a collection.
+        This trains the index on all rows, so it is expensive for large
+        collections: call it once ingestion is done (or set
+        `config.create_index` to build it automatically, once).
+
+        Args:
+            collection_name (str|None): collection to index; defaults to the
+                current collection.
+            replace (bool): whether to replace an existing index.
+        """
+        coll_name = collection_name or self.config.collection_name
+        if coll_name is None:
+            raise ValueError("No collection name set, cannot create index")
+        try:
+            tbl = self.client.open_table(coll_name)
+            tbl.create_index(
+                metric=self.config.distance,
+                num_partitions=self.config.index_num_partitions,
+                num_sub_vectors=self.config.index_num_sub_vectors,
+                replace=replace,
+            )
+        except Exception as e:
+            # e.g. too few rows to train the index: flat search still works
+            logger.warning(
+                f"""
+                Could not create ANN index on LanceDB collection {coll_name}:
+                {e}
+                Falling back to exhaustive search.
+                """
+            )
+
+    def _maybe_create_index(self, coll_name: str) -> None:
+        """
+        Build the ANN index on the collection if enabled in config, and the
+        collection has no index yet but has reached `config.index_min_rows` rows.
+        """
+        if not self.config.create_index:
+            return
+        tbl = self.client.open_table(coll_name)
+        if tbl.count_rows() < self.config.index_min_rows:
+            return
+        if any("vector" in i.get("fields", []) for i in tbl.to_lance().list_indices()):
+            return
+        self.create_index(coll_name, replace=False)
 
     def add_dataframe(
         self,
@@ -287,9 +357,7 @@ class LanceDB(VectorStore):
             df = df.rename(columns={content: "content"}, inplace=False)
 
         if "id" not in df.columns:
-            docs = dataframe_to_documents(df, content="content", metadata=metadata)
-            ids = [str(d.id()) for d in docs]
-            df["id"] = ids
+            df["id"] = [ObjectRegistry.new_id() for _ in range(len(df))]
 
         if "id" not in actual_metadata:
             actual_metadata += ["id"]
@@ -318,6 +386,7 @@ class LanceDB(VectorStore):
             # collection exists and is not empty, so append to it
             tbl = self.client.open_table(self.config.collection_name)
             tbl.add(df)
+        self._maybe_create_index(self.config.collection_name)  # type: ignore
 
     def delete_collection(self, collection_name: str) -> None:
         self.client.drop_table(collection_name, ignore_missing=True)
@@ -359,6 +428,78 @@ class LanceDB(VectorStore):
         pre_result = tbl.search(None).where(where or None).limit(None)
         return self._lance_result_to_docs(pre_result)
 
+    def stream_documents(
+        self, where: str = "", batch_size: int = 4096
+    ) -> Generator[List[Document], None, None]:
+        """
+        Page through the collection as Arrow record batches (skipping the
+        vector column), converting one batch at a time to Documents.
+        """
+        if self.config.collection_name is None:
+            raise ValueError("No collection name set, cannot retrieve docs")
+        dataset = self.client.open_table(self.config.collection_name).to_lance()
+        columns = [c for c in dataset.schema.names if c != "vector"]
+        for batch in dataset.to_batches(
+            columns=columns, filter=where or None, batch_size=batch_size
+        ):
+            if self.is_from_dataframe:
+                yield dataframe_to_documents(
+                    batch.to_pandas(),
+                    content="content",
+                    metadata=self.df_metadata_columns,
+                    doc_cls=self.config.document_class,
+                )
+            else:
+                yield self._records_to_docs(batch.to_pylist())
+
+    def distinct_field_values(self, fields: List[str]) -> Dict[str, Set[Any]]:
+        """
+        Compute distinct values of fields using Arrow compute kernels over only
+        the needed columns, rather than materializing all documents.
+        Falls back to the generic implementation if a field cannot be
+        resolved to a (possibly nested) column.
+        """
+        if self.config.collection_name is None:
+            raise ValueError("No collection name set, cannot retrieve docs")
+        try:
+            import pyarrow.compute as pc
+
+            dataset = self.client.open_table(self.config.collection_name).to_lance()
+            paths = [self._field_column_path(f, dataset.schema) for f in fields]
+            columns = list({p[0] for p in paths})
+            field_values: Dict[str, Set[Any]] = {f: set() for f in fields}
+            # accumulate uniques batch by batch, so the needed columns are
+            # never fully materialized
+            for batch in dataset.to_batches(columns=columns):
+                for field, path in zip(fields, paths):
+                    values = batch.column(path[0])
+                    for part in path[1:]:
+                        values = pc.struct_field(values, part)
+                    field_values[field].update(
+                        pc.unique(pc.drop_null(values)).to_pylist()
+                    )
+            return field_values
+        except Exception as e:
+            logger.info(f"Computing distinct field values document-by-document: {e}")
+            return super().distinct_field_values(fields)
+
+    @staticmethod
+    def _field_column_path(field: str, schema: "pa.Schema") -> List[str]:
+        """
+        Map a (possibly dotted) field name to a path of (nested) column names,
+        e.g. "metadata.genre" -> ["metadata", "genre"].
+        As in `extract_fields`, a non-dotted field that is not a top-level column
+        is looked up in the `metadata` struct column.
+        """
+        parts = field.split(".")
+        if parts[0] in schema.names:
+            return parts
+        if len(parts) == 1 and "metadata" in schema.names:
+            metadata_type = schema.field("metadata").type
+            if metadata_type.get_field_index(field) >= 0:
+                return ["metadata", field]
+        raise ValueError(f"Field {field} not found in LanceDB schema")
+
     def get_documents_by_ids(self, ids: List[str]) -> List[Document]:
         if self.config.collection_name is None:
             raise ValueError("No collection name set, cannot retrieve docs")
@@ -378,13 +519,43 @@ class LanceDB(VectorStore):
         where: Optional[str] = None,
     ) -> List[Tuple[Document, float]]:
         embedding = self.embedding_fn([text])[0]
+        return self._similar_to_embedding(text, embedding, k=k, where=where)
+
+    def similar_texts_with_scores_batch(
+        self,
+        texts: List[str],
+        k: int = 1,
+        where: Optional[str] = None,
+    ) -> List[List[Tuple[Document, float]]]:
+        """
+        Find k most similar texts to each of the given texts, embedding
+        all the texts in one batch.
+        """
+        if len(texts) == 0:
+            return []
+        embeddings = self.embedding_fn(texts)
+        return [
+            self._similar_to_embedding(text, embedding, k=k, where=where)
+            for text, embedding in zip(texts, embeddings)
+        ]
+
+    def _similar_to_embedding(
+        self,
+        text: str,
+        embedding: List[float],
+        k: int = 1,
+        where: Optional[str] = None,
+    ) -> List[Tuple[Document, float]]:
         tbl = self.client.open_table(self.config.collection_name)
         result = (
             tbl.search(embedding)
             .metric(self.config.distance)
+            .nprobes(self.config.search_nprobes)
             .where(where, prefilter=True)
             .limit(k)
         )
+        if self.config.search_refine_factor is not None:
+            result = result.refine_factor(self.config.search_refine_factor)
         docs = self._lance_result_to_docs(result)
         # note _distance is 1 - cosine
         if self.is_from_dataframe:
@@ -3,7 +3,8 @@ import json
 import logging
 import os
 import uuid
-from typing import Dict, List, Optional, Sequence, Tuple, TypeVar
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Generator, List, Optional, Sequence, Tuple, TypeVar
 
 from dotenv import load_dotenv
 from qdrant_client import QdrantClient
@@ -15,6 +16,11 @@ from qdrant_client.http.models import (
     Filter,
     NamedSparseVector,
     NamedVector,
+    QuantizationSearchParams,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    SearchParams,
     SearchRequest,
     SparseIndexParams,
     SparseVector,
@@ -29,6 +35,7 @@ from langroid.embedding_models.base import (
 from langroid.embedding_models.models import OpenAIEmbeddingsConfig
 from langroid.mytypes import Document, EmbeddingFunction, Embeddings
 from langroid.utils.configuration import settings
+from langroid.utils.pydantic_utils import model_to_builtins
 from langroid.vector_store.base import VectorStore, VectorStoreConfig
 
 logger = logging.getLogger(__name__)
@@ -71,6 +78,12 @@ class QdrantDBConfig(VectorStoreConfig):
     use_sparse_embeddings: bool = False
     sparse_embedding_model: str = "naver/splade-v3-distilbert"
     sparse_limit: int = 3
+    # Store int8-quantized copies of the dense vectors (in RAM), and search in two
+    # stages: retrieve `quantization_oversampling * k` candidates using the
+    # quantized vectors, then rescore these with the original vectors.
+    # Only applies to collections created with this setting.
+    quantize: bool = False
+    quantization_oversampling: float = 2.0
 
 
 class QdrantDB(VectorStore):
@@ -257,10 +270,16 @@ class QdrantDB(VectorStore):
             sparse_vectors_config = {
                 "text-sparse": SparseVectorParams(index=SparseIndexParams())
             }
+        quantization_config = None
+        if self.config.quantize:
+            quantization_config = ScalarQuantization(
+                scalar=ScalarQuantizationConfig(type=ScalarType.INT8, always_ram=True)
+            )
         self.client.create_collection(
             collection_name=collection_name,
             vectors_config=vectors_config,
             sparse_vectors_config=sparse_vectors_config,
+            quantization_config=quantization_config,
         )
         collection_info = self.client.get_collection(collection_name=collection_name)
         assert collection_info.status == CollectionStatus.GREEN
@@ -306,11 +325,7 @@ class QdrantDB(VectorStore):
         colls = self.list_collections(empty=True)
         if len(documents) == 0:
             return
-        document_dicts = [doc.dict() for doc in documents]
-        embedding_vecs = self.embedding_fn([doc.content for doc in documents])
-        sparse_embedding_vecs = self.get_sparse_embeddings(
-            [doc.content for doc in documents]
-        )
+        document_dicts = [model_to_builtins(doc) for doc in documents]
         if self.config.collection_name is None:
             raise ValueError("No collection name set, cannot ingest docs")
         if self.config.collection_name not in colls:
@@ -319,18 +334,49 @@ class QdrantDB(VectorStore):
         # don't insert all at once, batch in chunks of b,
         # else we get an API error
         b = self.config.batch_size
+        # ... but embed in (possibly larger) chunks that keep the embedding
+        # model's batches full
+        e = max(b, self.config.embedding.batch_size)
+        # Embedding (cpu/gpu/remote API) and upserting (disk/network) use
+        # different resources, so we pipeline them: while one chunk is being
+        # upserted in a background thread, we embed the next chunk.
+        # At most one chunk's upserts are in flight at a time.
+        pending: Future[None] | None = None
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            for i in range(0, len(ids), e):
+                contents = [doc.content for doc in documents[i : i + e]]
+                vectors: Dict[str, Embeddings | List[SparseVector]] = {
+                    "": self.embedding_fn(contents)
+                }
+                if self.config.use_sparse_embeddings:
+                    vectors["text-sparse"] = self.get_sparse_embeddings(contents)
+                if pending is not None:
+                    pending.result()  # surfaces any upsert error
+                pending = executor.submit(
+                    self._upsert_in_batches,
+                    ids[i : i + e],
+                    vectors,
+                    document_dicts[i : i + e],
+                )
+            if pending is not None:
+                pending.result()
+
+    def _upsert_in_batches(
+        self,
+        ids: List[int | str],
+        vectors: Dict[str, Embeddings | List[SparseVector]],
+        payloads: List[Dict[str, Any]],
+    ) -> None:
+        """Upsert the given points in batches of at most `config.batch_size`"""
+        assert self.config.collection_name is not None
+        b = self.config.batch_size
         for i in range(0, len(ids), b):
-            vectors: Dict[str, Embeddings | List[SparseVector]] = {
-                "": embedding_vecs[i : i + b]
-            }
-            if self.config.use_sparse_embeddings:
-                vectors["text-sparse"] = sparse_embedding_vecs[i : i + b]
             self.client.upsert(
                 collection_name=self.config.collection_name,
                 points=Batch(
                     ids=ids[i : i + b],
-                    vectors=vectors,
-                    payloads=document_dicts[i : i + b],
+                    vectors={name: v[i : i + b] for name, v in vectors.items()},
+                    payloads=payloads[i : i + b],
                 ),
             )
 
@@ -369,6 +415,16 @@ class QdrantDB(VectorStore):
         if self.config.collection_name is None:
             raise ValueError("No collection name set, cannot retrieve docs")
         docs = []
+        # try getting all at once, if not we keep paging
+        for batch in self.stream_documents(where=where, batch_size=10_000):
+            docs += batch
+        return docs
+
+    def stream_documents(
+        self, where: str = "", batch_size: int = 4096
+    ) -> Generator[List[Document], None, None]:
+        if self.config.collection_name is None:
+            raise ValueError("No collection name set, cannot retrieve docs")
         offset = 0
         filter = Filter() if where == "" else Filter.parse_obj(json.loads(where))
         while True:
@@ -376,19 +432,17 @@ class QdrantDB(VectorStore):
                 collection_name=self.config.collection_name,
                 scroll_filter=filter,
                 offset=offset,
-                limit=10_000,  # try getting all at once, if not we keep paging
+                limit=batch_size,
                 with_payload=True,
                 with_vectors=False,
             )
-            docs += [
+            yield [
                 self.config.document_class(**record.payload)  # type: ignore
                 for record in results
             ]
-            # ignore
             if next_page_offset is None:
                 break
             offset = next_page_offset  # type: ignore
-        return docs
 
     def get_documents_by_ids(self, ids: List[str]) -> List[Document]:
         if self.config.collection_name is None:
@@ -414,42 +468,79 @@ class QdrantDB(VectorStore):
         where: Optional[str] = None,
         neighbors: int = 0,
     ) -> List[Tuple[Document, float]]:
-        embedding = self.embedding_fn([text])[0]
+        return self.similar_texts_with_scores_batch([text], k=k, where=where)[0]
+
+    def similar_texts_with_scores_batch(
+        self,
+        texts: List[str],
+        k: int = 1,
+        where: Optional[str] = None,
+    ) -> List[List[Tuple[Document, float]]]:
+        """
+        Find k most similar texts to each of the given texts: the texts are
+        embedded in one batch, and searched for in a single `search_batch` request.
+        """
+        if len(texts) == 0:
+            return []
+        embeddings = self.embedding_fn(texts)
+        sparse_embeddings = self.get_sparse_embeddings(texts)
         # TODO filter may not work yet
         if where is None or where == "":
             filter = Filter()
         else:
             filter = Filter.parse_obj(json.loads(where))
-        requests = [
-            SearchRequest(
-                vector=NamedVector(
-                    name="",
-                    vector=embedding,
-                ),
-                limit=k,
-                with_payload=True,
-                filter=filter,
-            )
-        ]
-        if self.config.use_sparse_embeddings:
-            sparse_embedding = self.get_sparse_embeddings([text])[0]
+        requests = []
+        for i, embedding in enumerate(embeddings):
             requests.append(
                 SearchRequest(
-                    vector=NamedSparseVector(
-                        name="text-sparse",
-                        vector=sparse_embedding,
+                    vector=NamedVector(
+                        name="",
+                        vector=embedding,
                     ),
-                    limit=self.config.sparse_limit,
+                    limit=k,
                     with_payload=True,
                     filter=filter,
+                    params=(
+                        SearchParams(
+                            quantization=QuantizationSearchParams(
+                                rescore=True,
+                                oversampling=self.config.quantization_oversampling,
+                            )
+                        )
+                        if self.config.quantize
+                        else None
+                    ),
                 )
             )
+            if self.config.use_sparse_embeddings:
+                requests.append(
+                    SearchRequest(
+                        vector=NamedSparseVector(
+                            name="text-sparse",
+                            vector=sparse_embeddings[i],
+                        ),
+                        limit=self.config.sparse_limit,
+                        with_payload=True,
+                        filter=filter,
+                    )
+                )
         if self.config.collection_name is None:
             raise ValueError("No collection name set, cannot search")
         search_result_lists: List[List[ScoredPoint]] = self.client.search_batch(
             collection_name=self.config.collection_name, requests=requests
         )
+        # consecutive groups of results (dense, and maybe sparse) for each text
+        n_requests = len(requests) // len(texts)
+        return [
+            self._docs_scores(
+                text, search_result_lists[i * n_requests : (i + 1) * n_requests]
+            )
+            for i, text in enumerate(texts)
+        ]
 
+    def _docs_scores(
+        self, text: str, search_result_lists: List[List[ScoredPoint]]
+    ) -> List[Tuple[Document, float]]:
         search_result = [
             match for result in search_result_lists for match in result
         ]  # 2D list -> 1D list
@@ -563,6 +563,10 @@ def test_doc_chat_rerank_periphery(test_settings: Settings, vecdb):
     numbers = [int(d.content) for d in reranked]
     assert numbers == [0, 2, 4, 6, 8, 9, 7, 5, 3, 1]
 
+    reranked = agent.rerank_to_periphery(docs[:9])
+    numbers = [int(d.content) for d in reranked]
+    assert numbers == [0, 2, 4, 6, 8, 7, 5, 3, 1]
+
 
 data = {
     "id": ["A100", "B200", "C300", "D400", "E500"],
@@ -707,6 +711,36 @@ def test_doc_chat_incremental_ingest(
     )
 
 
+@pytest.mark.parametrize("vecdb", ["chroma", "qdrant_local"], indirect=True)
+def test_doc_chat_skip_duplicate_docs(test_settings: Settings, vecdb):
+    """
+    Check that re-ingesting identical docs does not re-embed/store them,
+    while docs with same content but different metadata are ingested.
+    """
+    agent = DocChatAgent(_MyDocChatAgentConfig(skip_duplicate_docs=True))
+    agent.vecdb = vecdb
+
+    set_global(test_settings)
+
+    sentences = ["Cats are quiet and clean.", "Dogs are loud and messy."]
+
+    def make_docs(source: str) -> List[Document]:
+        return [Document(content=s, metadata=dict(source=source)) for s in sentences]
+
+    assert agent.ingest_docs(make_docs("animals")) > 0
+    n_docs = len(agent.original_docs)
+    assert agent.ingest_docs(make_docs("animals")) == 0
+    assert len(agent.original_docs) == n_docs
+    assert agent.ingest_docs(make_docs("pets")) > 0
+    assert len(agent.original_docs) == 2 * n_docs
+    # identical docs within a single call are all ingested
+    agent.ingest_docs(make_docs("zoo") + make_docs("zoo"))
+    assert len(agent.original_docs) == 4 * n_docs
+    # docs ingested into another collection are not skipped
+    vecdb.set_collection("test-skip-duplicate-docs-other", replace=True)
+    assert agent.ingest_docs(make_docs("animals")) > 0
+
+
 @pytest.mark.parametrize("vecdb", ["chroma", "qdrant_local"], indirect=True)
 @pytest.mark.parametrize(
     "splitter", [Splitter.PARA_SENTENCE, Splitter.SIMPLE, Splitter.TOKENS]
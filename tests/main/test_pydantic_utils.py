@@ -1,7 +1,12 @@
 import pytest
 
+from langroid.mytypes import DocMetaData, Document
 from langroid.pydantic_v1 import BaseModel
-from langroid.utils.pydantic_utils import extract_fields, flatten_dict
+from langroid.utils.pydantic_utils import (
+    extract_fields,
+    flatten_dict,
+    model_to_builtins,
+)
 
 
 class DetailsModel(BaseModel):
@@ -75,3 +80,24 @@ def test_flatten_dict(input_dict, expected_output):
 )
 def test_flatten_dict_custom_separator(input_dict, separator, expected_output):
     assert flatten_dict(input_dict, sep=separator) == expected_output
+
+
+def test_model_to_builtins():
+    test_instance = TestModel(
+        name="John Doe", age=30, details=DetailsModel(height=180.5, weight=75.0)
+    )
+    assert model_to_builtins(test_instance) == test_instance.dict()
+
+    # extra metadata fields, incl. nested models, are converted as well
+    doc = Document(
+        content="hello",
+        metadata=DocMetaData(
+            source="wiki",
+            window_ids=["a", "b"],
+            year=2001,
+            details=[DetailsModel(height=1.0, weight=2.0)],
+        ),
+    )
+    result = model_to_builtins(doc)
+    assert result == doc.dict()
+    assert result["metadata"]["details"] == [{"height": 1.0, "weight": 2.0}]
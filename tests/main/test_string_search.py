@@ -1,11 +1,14 @@
+import numpy as np
 import pytest
 
 from langroid.mytypes import DocMetaData, Document
 from langroid.parsing.search import (
+    build_bm25_index,
     find_closest_matches_with_bm25,
     find_fuzzy_matches_in_docs,
     get_context,
     preprocess_text,
+    top_k_indices,
 )
 
 
@@ -88,6 +91,17 @@ def test_matching_docs(sample_docs, original_docs):
     assert len(result) == 2 and all(doc in original_docs for doc, score in result)
 
 
+def test_matching_docs_prebuilt_index(sample_docs, original_docs):
+    query = "test"
+    bm25 = build_bm25_index(sample_docs)
+    result = find_closest_matches_with_bm25(
+        original_docs, sample_docs, query, k=2, bm25=bm25
+    )
+    assert result == find_closest_matches_with_bm25(
+        original_docs, sample_docs, query, k=2
+    )
+
+
 def test_preprocess_lowercase():
     result = preprocess_text("HELLO WORLD")
     assert result == "hello world"
@@ -143,3 +157,10 @@ def test_get_context(query, text, before, after, expected, not_expected):
     not_expected = not_expected.split(",")
     assert all(word in result for word in expected)
     assert all(word not in result for word in not_expected)
+
+
+@pytest.mark.parametrize("k", [0, 1, 3, 5, 8, 20])
+def test_top_k_indices(k):
+    scores = np.array([0.5, 2.0, 0.5, 3.0, 2.0, 0.5, 1.0, 0.0])
+    expected = sorted(range(len(scores)), key=lambda i: -scores[i])[:k]
+    assert list(top_k_indices(scores, k)) == expected
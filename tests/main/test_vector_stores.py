@@ -180,6 +180,24 @@ def test_vector_stores_search(
     assert set(results).issubset(set(matching_docs))
 
 
+@pytest.mark.parametrize(
+    "vecdb",
+    ["lancedb", "chroma", "qdrant_local", "qdrant_hybrid_cloud"],
+    indirect=True,
+)
+def test_vector_stores_search_batch(vecdb):
+    queries = ["capital of France", "hello", "Canadian residents"]
+    k = len(vars(phrases))
+    batch_results = vecdb.similar_texts_with_scores_batch(queries, k=k)
+    assert len(batch_results) == len(queries)
+    for query, docs_and_scores in zip(queries, batch_results):
+        single = vecdb.similar_texts_with_scores(query, k=k)
+        assert [d.content for d, _ in docs_and_scores] == [d.content for d, _ in single]
+        assert [s for _, s in docs_and_scores] == pytest.approx(
+            [s for _, s in single], abs=1e-4
+        )
+
+
 @pytest.mark.parametrize(
     "query,results,exceptions",
     [